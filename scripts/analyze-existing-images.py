@@ -13,13 +13,32 @@ import sys
 import os
 import json
 import base64
+import asyncio
+import hashlib
+import functools
+import io
+import time
+import random
 import argparse
+import socket
+import threading
+import http.client
+from collections import Counter
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from urllib.request import urlopen, Request
-from urllib.error import URLError
+from urllib.parse import urlsplit
+from urllib.error import URLError, HTTPError
 from typing import Optional, Tuple
 
+# Optional: orjson for faster JSON encoding/decoding (falls back to stdlib json).
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so error handling is shared.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Valid image categories
 VALID_CATEGORIES = [
     "cartoon",
@@ -35,32 +54,223 @@ VALID_CATEGORIES = [
     "product_page",
     "other"
 ]
+VALID_CATEGORIES_SET = frozenset(VALID_CATEGORIES)
+
+
+@dataclass(slots=True)
+class TokenStats:
+    """Running token usage; add() is safe to call from worker threads."""
+    input: int = 0
+    output: int = 0
+    cached: int = 0  # input tokens served from the provider's prompt cache
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> None:
+        with self._lock:
+            self.input += input_tokens
+            self.output += output_tokens
+            self.cached += cached_tokens
+
+    @property
+    def total(self) -> int:
+        return self.input + self.output
+
+    def as_dict(self) -> dict:
+        return {"input": self.input, "output": self.output, "cached": self.cached, "total": self.total}
 
-# Token tracking
-total_input_tokens = 0
-total_output_tokens = 0
+
+token_usage = TokenStats()
+
+# Default number of in-flight requests per backend. Local servers only
+# parallelize up to their own slot count (e.g. OLLAMA_NUM_PARALLEL), so
+# keep those low; the cloud API tolerates more.
+DEFAULT_CONCURRENCY = {
+    "gemini": 8,
+    "lmstudio": 4,
+    "ollama": 2,
+}
 
 # Backend configuration
 LMSTUDIO_URL = "http://localhost:1234"
 OLLAMA_URL = "http://localhost:11434"
 
+# Ollama model families that indicate vision support
+OLLAMA_VISION_FAMILIES = frozenset({"clip", "mllama"})
+
+# Images larger than this (longest side, in pixels) are downscaled before
+# upload; vision models tile/resize internally, so the extra pixels only
+# cost bandwidth and prompt tokens. Set from --max-dim / --jpeg-quality.
+MAX_IMAGE_DIM = 1024
+JPEG_QUALITY = 85
+# Bytes saved per downscaled image (keyed by path so re-sends count once)
+downscale_bytes_saved = {}
+
+# Retry policy for transient backend failures (rate limits, overloaded or
+# restarting servers). Malformed responses are not retried.
+RETRY_ATTEMPTS = 5
+RETRY_INITIAL_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Gemini Batch Mode: inline request payloads are capped at 20MB per job
+GEMINI_BATCH_MAX_INLINE_BYTES = 18 * 1024 * 1024
+GEMINI_BATCH_POLL_SECONDS = 30
+GEMINI_BATCH_DONE_STATES = frozenset({
+    "JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"
+})
+
+MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp"
+}
+
+
+def json_loads(data):
+    """Decode JSON from str or bytes."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def json_dumps_bytes(obj) -> bytes:
+    """Encode obj as compact UTF-8 JSON bytes."""
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode("utf-8")
+
+
+def read_json(path: Path):
+    """Read a JSON file."""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
+def write_json(path: Path, obj) -> None:
+    """Write obj to path as 2-space indented UTF-8 JSON.
+
+    Writes to a temporary file first and renames it over path, so an
+    interrupted run never leaves a truncated file behind.
+    """
+    if orjson:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# Keep-alive connections to the backend servers, one set per thread
+# (http.client connections are not thread-safe).
+_http_local = threading.local()
+
+
+def http_request(method: str, url: str, payload: Optional[dict] = None, timeout: float = 5) -> bytes:
+    """Send an HTTP request over a reused keep-alive connection and return the body.
+
+    Raises URLError (an OSError) on connection problems and HTTPError on
+    4xx/5xx responses, like urllib.request.urlopen.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    body = json_dumps_bytes(payload) if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+
+    connections = _http_local.__dict__.setdefault("connections", {})
+    for attempt in range(2):
+        conn = connections.get(key)
+        reused = conn is not None
+        if conn is None:
+            conn_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            conn = connections[key] = conn_class(parts.netloc, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            del connections[key]
+            # The server may have closed an idle keep-alive connection; retry once on a fresh one
+            if reused and attempt == 0:
+                continue
+            raise e if isinstance(e, URLError) else URLError(e)
+
+        if response.status >= 400:
+            raise HTTPError(url, response.status, response.reason, response.headers, None)
+        return data
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Return True for transport errors and 408/429/5xx responses."""
+    if isinstance(error, HTTPError):
+        return error.code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (URLError, TimeoutError, ConnectionError)):
+        return True
+    # SDK errors (e.g. google.genai.errors.APIError) carry the HTTP status as .code
+    return getattr(error, 'code', None) in RETRYABLE_STATUS_CODES
+
+
+def get_retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before the next attempt: Retry-After if given, else exponential backoff with jitter."""
+    headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None)
+    if headers:
+        try:
+            return min(float(headers.get('Retry-After')), RETRY_MAX_DELAY)
+        except (TypeError, ValueError):
+            pass
+    return min(RETRY_INITIAL_DELAY * 2 ** attempt + random.uniform(0, 1), RETRY_MAX_DELAY)
+
+
+def call_with_retries(fn, *args, **kwargs):
+    """Call fn, retrying transient failures with exponential backoff."""
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == RETRY_ATTEMPTS - 1 or not is_retryable_error(e):
+                raise
+            delay = get_retry_delay(e, attempt)
+            print(f"    Request failed ({e}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+def port_is_open(url: str, timeout: float = 0.2) -> bool:
+    """Return True if something accepts TCP connections at the URL's host and port.
+
+    A refused connection fails in milliseconds, unlike waiting for an HTTP
+    timeout, so this is used to rule out servers that aren't running.
+    """
+    parts = urlsplit(url)
+    try:
+        with socket.create_connection((parts.hostname, parts.port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
 
 def check_lmstudio_available() -> bool:
     """Check if LM Studio server is running."""
+    if not port_is_open(LMSTUDIO_URL):
+        return False
     try:
-        req = Request(f"{LMSTUDIO_URL}/v1/models", method="GET")
-        with urlopen(req, timeout=2) as response:
-            return response.status == 200
+        http_request("GET", f"{LMSTUDIO_URL}/v1/models", timeout=2)
+        return True
     except (URLError, OSError):
         return False
 
 
 def check_ollama_available() -> bool:
     """Check if Ollama server is running."""
+    if not port_is_open(OLLAMA_URL):
+        return False
     try:
-        req = Request(f"{OLLAMA_URL}/api/tags", method="GET")
-        with urlopen(req, timeout=2) as response:
-            return response.status == 200
+        http_request("GET", f"{OLLAMA_URL}/api/tags", timeout=2)
+        return True
     except (URLError, OSError):
         return False
 
@@ -69,25 +279,21 @@ def get_lmstudio_models() -> list[dict]:
     """Get list of available vision models from LM Studio using v0 API."""
     try:
         # Try v0 API first (has type field for vision detection)
-        req = Request(f"{LMSTUDIO_URL}/api/v0/models", method="GET")
-        with urlopen(req, timeout=5) as response:
-            data = json.loads(response.read().decode())
-            models = []
-            for m in data.get("data", []):
-                # Prefer VLMs but include all models (some text models handle images via API)
-                model_type = m.get("type", "")
-                name = m.get("id", "Unknown")
-                models.append({"id": m["id"], "name": name, "vision": model_type == "vlm"})
-            # Sort: vision models first, then alphabetical
-            models.sort(key=lambda x: (not x.get("vision", False), x["name"]))
-            return models
+        data = json_loads(http_request("GET", f"{LMSTUDIO_URL}/api/v0/models", timeout=5))
+        models = []
+        for m in data.get("data", []):
+            # Prefer VLMs but include all models (some text models handle images via API)
+            model_type = m.get("type", "")
+            name = m.get("id", "Unknown")
+            models.append({"id": m["id"], "name": name, "vision": model_type == "vlm"})
+        # Sort: vision models first, then alphabetical
+        models.sort(key=lambda x: (not x.get("vision", False), x["name"]))
+        return models
     except (URLError, OSError, json.JSONDecodeError):
         # Fall back to v1 API (no type info available)
         try:
-            req = Request(f"{LMSTUDIO_URL}/v1/models", method="GET")
-            with urlopen(req, timeout=5) as response:
-                data = json.loads(response.read().decode())
-                return [{"id": m["id"], "name": m.get("id", "Unknown")} for m in data.get("data", [])]
+            data = json_loads(http_request("GET", f"{LMSTUDIO_URL}/v1/models", timeout=5))
+            return [{"id": m["id"], "name": m.get("id", "Unknown")} for m in data.get("data", [])]
         except (URLError, OSError, json.JSONDecodeError):
             return []
 
@@ -95,102 +301,155 @@ def get_lmstudio_models() -> list[dict]:
 def get_ollama_model_families(model_name: str) -> list[str]:
     """Get the model families from Ollama's show endpoint."""
     try:
-        req = Request(
-            f"{OLLAMA_URL}/api/show",
-            data=json.dumps({"name": model_name}).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST"
-        )
-        with urlopen(req, timeout=5) as response:
-            data = json.loads(response.read().decode())
-            return data.get("details", {}).get("families", [])
+        data = json_loads(http_request("POST", f"{OLLAMA_URL}/api/show", {"name": model_name}, timeout=5))
+        return data.get("details", {}).get("families", [])
     except (URLError, OSError, json.JSONDecodeError):
         return []
 
 
 def is_ollama_vision_model(families: list[str]) -> bool:
     """Check if Ollama model families indicate vision capability."""
-    if not families:
-        return False
-    vision_indicators = ["clip", "mllama"]
-    for family in families:
-        family_lower = family.lower()
-        # Check for known vision families
-        if family_lower in vision_indicators:
-            return True
-        # Check for vision-language family suffix (e.g., qwen25vl, qwen3vl)
-        if family_lower.endswith("vl"):
-            return True
-    return False
+    # Known vision families, or a vision-language family suffix (e.g., qwen25vl, qwen3vl)
+    return any(
+        (family_lower := family.lower()) in OLLAMA_VISION_FAMILIES or family_lower.endswith("vl")
+        for family in families or ()
+    )
 
 
 def get_ollama_models() -> list[dict]:
     """Get list of available vision models from Ollama."""
     try:
-        req = Request(f"{OLLAMA_URL}/api/tags", method="GET")
-        with urlopen(req, timeout=5) as response:
-            data = json.loads(response.read().decode())
-            models = []
-            for m in data.get("models", []):
-                name = m.get("name", "")
-                families = get_ollama_model_families(name)
-                if is_ollama_vision_model(families):
-                    models.append({"id": name, "name": name, "families": families})
-            return models
+        data = json_loads(http_request("GET", f"{OLLAMA_URL}/api/tags", timeout=5))
+        names = [m.get("name", "") for m in data.get("models", [])]
+        if not names:
+            return []
+
+        # One /api/show round-trip per model; issue them in parallel
+        with ThreadPoolExecutor(max_workers=min(8, len(names))) as executor:
+            all_families = list(executor.map(get_ollama_model_families, names))
+
+        models = []
+        for name, families in zip(names, all_families):
+            if is_ollama_vision_model(families):
+                models.append({"id": name, "name": name, "families": families})
+        return models
     except (URLError, OSError, json.JSONDecodeError):
         return []
 
 
-def list_available_backends() -> dict:
-    """List all available backends and their models."""
-    backends = {}
+def list_available_backends(only: Optional[str] = None) -> dict:
+    """List all available backends and their models.
+
+    If only is given, just that backend is probed. The local servers are
+    probed in parallel.
+    """
+    local_backends = {
+        "lmstudio": (LMSTUDIO_URL, check_lmstudio_available, get_lmstudio_models),
+        "ollama": (OLLAMA_URL, check_ollama_available, get_ollama_models),
+    }
+    wanted = [name for name in local_backends if only in (None, name)]
 
-    # Check LM Studio
-    if check_lmstudio_available():
-        models = get_lmstudio_models()
-        if models:
-            backends["lmstudio"] = {"url": LMSTUDIO_URL, "models": models}
+    def probe(name):
+        _, check_available, get_models = local_backends[name]
+        return get_models() if check_available() else []
 
-    # Check Ollama
-    if check_ollama_available():
-        models = get_ollama_models()
-        if models:
-            backends["ollama"] = {"url": OLLAMA_URL, "models": models}
+    backends = {}
+    if wanted:
+        with ThreadPoolExecutor(max_workers=len(wanted)) as executor:
+            for name, models in zip(wanted, executor.map(probe, wanted)):
+                if models:
+                    backends[name] = {"url": local_backends[name][0], "models": models}
 
     # Check Gemini
     api_key = os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
-    if api_key:
+    if only in (None, "gemini") and api_key:
         backends["gemini"] = {"models": [{"id": "gemini-3-flash-preview", "name": "Gemini 3 Flash Preview"}]}
 
     return backends
 
 
+def load_image_bytes(image_path: Path) -> Tuple[bytes, str]:
+    """Read image bytes for upload, downscaling images larger than MAX_IMAGE_DIM.
+
+    Images within the limit (or when Pillow is unavailable) are sent as-is.
+    Downscaled images are re-encoded as PNG when they have transparency or
+    a small palette (typical for screenshots), otherwise as JPEG.
+    """
+    mime_type = MIME_TYPES.get(image_path.suffix.lower(), "image/jpeg")
+    image_bytes = image_path.read_bytes()
+
+    if not MAX_IMAGE_DIM:
+        return image_bytes, mime_type
+
+    try:
+        from PIL import Image
+    except ImportError:
+        return image_bytes, mime_type
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            if max(img.size) <= MAX_IMAGE_DIM:
+                return image_bytes, mime_type
+
+            # thumbnail() lets the JPEG decoder downscale while decoding (draft
+            # mode) and pre-reduces before the LANCZOS pass, so large photos are
+            # never fully decoded at original size
+            img.thumbnail((MAX_IMAGE_DIM, MAX_IMAGE_DIM), Image.LANCZOS, reducing_gap=2.0)
+            buffer = io.BytesIO()
+            if img.mode in ("RGBA", "LA", "P", "1") or img.getcolors(256):
+                # optimize=True costs 2-3x the encode time for ~15% smaller files
+                img.save(buffer, format="PNG")
+                mime_type = "image/png"
+            else:
+                img.convert("RGB").save(buffer, format="JPEG", quality=JPEG_QUALITY)
+                mime_type = "image/jpeg"
+            downscale_bytes_saved[image_path] = len(image_bytes) - buffer.tell()
+            return buffer.getvalue(), mime_type
+    except (OSError, ValueError) as e:
+        print(f"    Warning: Could not downscale {image_path.name}, sending original: {e}")
+        return image_bytes, mime_type
+
+
 def encode_image_base64(image_path: Path) -> Tuple[str, str]:
-    """Encode image to base64 and determine MIME type."""
-    suffix = image_path.suffix.lower()
-    mime_types = {
-        ".jpg": "image/jpeg",
-        ".jpeg": "image/jpeg",
-        ".png": "image/png",
-        ".gif": "image/gif",
-        ".webp": "image/webp"
-    }
-    mime_type = mime_types.get(suffix, "image/jpeg")
+    """Encode image to base64 and determine MIME type.
 
-    with open(image_path, "rb") as f:
-        image_data = base64.b64encode(f.read()).decode("utf-8")
+    Results are memoized per (path, mtime, size), so an image re-sent after
+    a failed batch is not read and encoded again.
+    """
+    stat = image_path.stat()
+    return _encode_image_base64_cached(image_path, stat.st_mtime_ns, stat.st_size,
+                                       MAX_IMAGE_DIM, JPEG_QUALITY)
 
-    return image_data, mime_type
 
+@functools.lru_cache(maxsize=64)
+def _encode_image_base64_cached(image_path: Path, mtime_ns: int, size: int,
+                                max_dim: int, jpeg_quality: int) -> Tuple[str, str]:
+    image_bytes, mime_type = load_image_bytes(image_path)
+    # base64 output is pure ASCII, which decodes faster than UTF-8
+    return base64.b64encode(image_bytes).decode("ascii"), mime_type
 
-def get_analysis_prompt(slide_title: Optional[str] = None) -> str:
-    """Generate the analysis prompt."""
-    context = f" from slide '{slide_title}'" if slide_title else ""
-    categories_list = ", ".join(VALID_CATEGORIES)
 
-    return f"""Analyze this presentation slide image{context}. Respond in JSON format:
+def file_sha256(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents, reading it in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
-{{
+def load_analysis_cache(cache_path: Path) -> dict:
+    """Load cached analysis results keyed by analysis_cache_key()."""
+    if not cache_path.exists():
+        return {}
+    try:
+        return read_json(cache_path)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not read analysis cache, starting fresh: {e}")
+        return {}
+
+
+ANALYSIS_FIELDS_AND_RULES = """{{
   "description": "Brief description of what the image shows (50-100 words)",
   "category": "one of: {categories_list}",
   "has_quote": true/false,
@@ -216,21 +475,74 @@ Focus on:
 1. Tweets - extract the full tweet text and @handle
 2. Slack/chat messages - extract the message and sender name
 3. Screenshots with quotes - extract any quotable statements
-4. Social media posts - extract the post content and author
+4. Social media posts - extract the post content and author""".format(categories_list=", ".join(VALID_CATEGORIES))
+
+# The instructions are identical for every request, so they go first and the
+# per-image slide context last: providers cache matching prompt prefixes
+# (Gemini implicit caching, llama.cpp/LM Studio KV reuse) and bill or
+# process the cached part more cheaply.
+_ANALYSIS_PROMPT = f"""Analyze this presentation slide image. Respond in JSON format:
+
+{ANALYSIS_FIELDS_AND_RULES}
 
 Return ONLY valid JSON, no other text."""
 
+_BATCH_ANALYSIS_PROMPT_PREFIX = f"""Analyze the presentation slide images that follow. For each image, respond with an object in this JSON format:
+
+{ANALYSIS_FIELDS_AND_RULES}"""
+
+
+# Changes whenever the prompt text does, so cached results from an older
+# prompt are not reused
+_PROMPT_FINGERPRINT = hashlib.sha256(
+    (_ANALYSIS_PROMPT + _BATCH_ANALYSIS_PROMPT_PREFIX).encode("utf-8")).hexdigest()[:12]
+
+
+def analysis_cache_key(image_hash: str, backend: str, model: str) -> str:
+    """Cache key for an image analyzed by backend/model with the current prompts.
+
+    Results from another backend, model or prompt version are misses.
+    """
+    return f"{backend}:{model}:{_PROMPT_FINGERPRINT}:{image_hash}"
+
+
+def get_analysis_prompt(slide_title: Optional[str] = None) -> str:
+    """Generate the analysis prompt."""
+    if not slide_title:
+        return _ANALYSIS_PROMPT
+    return f"{_ANALYSIS_PROMPT}\n\nThe image is from slide '{slide_title}'."
 
-def analyze_with_gemini(image_path: Path, slide_title: Optional[str] = None) -> Optional[dict]:
-    """Analyze image using Gemini API."""
-    global total_input_tokens, total_output_tokens
 
+def get_batch_analysis_prompt(slide_titles: list[Optional[str]]) -> str:
+    """Generate the analysis prompt for several images sent in one request."""
+    n = len(slide_titles)
+    image_lines = "\n".join(
+        f"- Image {i}: from slide '{title}'" if title else f"- Image {i}"
+        for i, title in enumerate(slide_titles, 1)
+    )
+
+    return f"""{_BATCH_ANALYSIS_PROMPT_PREFIX}
+
+There are {n} images, given in order:
+{image_lines}
+
+Return ONLY a valid JSON array with exactly {n} objects, one per image, in the same order as the images. No other text."""
+
+
+@functools.lru_cache(maxsize=None)
+def get_gemini_client(api_key: str):
+    """Return a shared Gemini client so concurrent workers reuse one HTTP connection pool."""
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+def gemini_generate(prompt: str, image_paths: list[Path]) -> Optional[str]:
+    """Send a prompt and images to Gemini and return the response text."""
     try:
-        from google import genai
-        from PIL import Image
+        from google.genai import types
     except ImportError:
-        print("Error: google-genai and Pillow required for Gemini backend")
-        print("Install with: pip install google-genai Pillow")
+        print("Error: google-genai required for Gemini backend")
+        print("Install with: pip install google-genai")
         return None
 
     api_key = os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
@@ -239,118 +551,144 @@ def analyze_with_gemini(image_path: Path, slide_title: Optional[str] = None) ->
         return None
 
     try:
-        client = genai.Client(api_key=api_key)
-        image = Image.open(image_path)
-        prompt = get_analysis_prompt(slide_title)
-
-        response = client.models.generate_content(
+        client = get_gemini_client(api_key)
+        # Send the (downscaled) encoded bytes as-is rather than decoding to a
+        # PIL image that the SDK would just re-encode
+        images = []
+        for image_path in image_paths:
+            image_bytes, mime_type = load_image_bytes(image_path)
+            images.append(types.Part.from_bytes(data=image_bytes, mime_type=mime_type))
+
+        response = call_with_retries(
+            client.models.generate_content,
             model='gemini-3-flash-preview',
-            contents=[prompt, image]
+            contents=[prompt, *images]
         )
 
-        response_text = (response.text or "").strip()
-
         if hasattr(response, 'usage_metadata'):
-            total_input_tokens += getattr(response.usage_metadata, 'prompt_token_count', 0)
-            total_output_tokens += getattr(response.usage_metadata, 'candidates_token_count', 0)
+            token_usage.add(
+                getattr(response.usage_metadata, 'prompt_token_count', 0) or 0,
+                getattr(response.usage_metadata, 'candidates_token_count', 0) or 0,
+                getattr(response.usage_metadata, 'cached_content_token_count', 0) or 0
+            )
 
-        return parse_json_response(response_text)
+        return (response.text or "").strip()
     except Exception as e:
         print(f"    Warning: Gemini analysis failed: {e}")
         return None
 
 
-def analyze_with_lmstudio(image_path: Path, model: str, slide_title: Optional[str] = None) -> Optional[dict]:
-    """Analyze image using LM Studio (OpenAI-compatible API)."""
-    global total_input_tokens, total_output_tokens
-
+def lmstudio_generate(prompt: str, image_paths: list[Path], model: str) -> Optional[str]:
+    """Send a prompt and images to LM Studio (OpenAI-compatible API) and return the response text."""
     try:
-        image_data, mime_type = encode_image_base64(image_path)
-        prompt = get_analysis_prompt(slide_title)
+        content = [{"type": "text", "text": prompt}]
+        for image_path in image_paths:
+            image_data, mime_type = encode_image_base64(image_path)
+            data_url = f"data:{mime_type};base64,{image_data}"
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": data_url
+                }
+            })
 
         payload = {
             "model": model,
             "messages": [
                 {
                     "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{image_data}"
-                            }
-                        }
-                    ]
+                    "content": content
                 }
             ],
-            "max_tokens": 1000,
+            "max_tokens": 1000 * len(image_paths),
             "temperature": 0.1
         }
 
-        req = Request(
-            f"{LMSTUDIO_URL}/v1/chat/completions",
-            data=json.dumps(payload).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST"
-        )
-
-        with urlopen(req, timeout=120) as response:
-            data = json.loads(response.read().decode())
-            response_text = data["choices"][0]["message"]["content"].strip()
+        data = json_loads(call_with_retries(http_request, "POST", f"{LMSTUDIO_URL}/v1/chat/completions",
+                                            payload, timeout=120 * len(image_paths)))
 
-            # Track tokens if available
-            if "usage" in data:
-                total_input_tokens += data["usage"].get("prompt_tokens", 0)
-                total_output_tokens += data["usage"].get("completion_tokens", 0)
+        # Track tokens if available
+        if "usage" in data:
+            token_usage.add(
+                data["usage"].get("prompt_tokens", 0),
+                data["usage"].get("completion_tokens", 0),
+                (data["usage"].get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+            )
 
-            return parse_json_response(response_text)
+        return data["choices"][0]["message"]["content"].strip()
     except Exception as e:
         print(f"    Warning: LM Studio analysis failed: {e}")
         return None
 
 
-def analyze_with_ollama(image_path: Path, model: str, slide_title: Optional[str] = None) -> Optional[dict]:
-    """Analyze image using Ollama API."""
-    global total_input_tokens, total_output_tokens
-
+def ollama_generate(prompt: str, image_paths: list[Path], model: str) -> Optional[str]:
+    """Send a prompt and images to Ollama and return the response text."""
     try:
-        image_data, _ = encode_image_base64(image_path)
-        prompt = get_analysis_prompt(slide_title)
-
         payload = {
             "model": model,
             "prompt": prompt,
-            "images": [image_data],
+            "images": [encode_image_base64(image_path)[0] for image_path in image_paths],
             "stream": False,
             "options": {
                 "temperature": 0.1
             }
         }
 
-        req = Request(
-            f"{OLLAMA_URL}/api/generate",
-            data=json.dumps(payload).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST"
-        )
-
-        with urlopen(req, timeout=120) as response:
-            data = json.loads(response.read().decode())
-            response_text = data.get("response", "").strip()
+        data = json_loads(call_with_retries(http_request, "POST", f"{OLLAMA_URL}/api/generate",
+                                            payload, timeout=120 * len(image_paths)))
 
-            # Track tokens if available
-            total_input_tokens += data.get("prompt_eval_count", 0)
-            total_output_tokens += data.get("eval_count", 0)
+        # Track tokens if available
+        token_usage.add(data.get("prompt_eval_count", 0), data.get("eval_count", 0))
 
-            return parse_json_response(response_text)
+        return data.get("response", "").strip()
     except Exception as e:
         print(f"    Warning: Ollama analysis failed: {e}")
         return None
 
 
-def parse_json_response(response_text: str) -> Optional[dict]:
-    """Parse JSON from model response, handling markdown code blocks."""
+def generate(prompt: str, image_paths: list[Path], backend: str, model: str) -> Optional[str]:
+    """Send a prompt and images to the specified backend and return the response text."""
+    if backend == "gemini":
+        return gemini_generate(prompt, image_paths)
+    elif backend == "lmstudio":
+        return lmstudio_generate(prompt, image_paths, model)
+    elif backend == "ollama":
+        return ollama_generate(prompt, image_paths, model)
+    else:
+        print(f"Error: Unknown backend '{backend}'")
+        return None
+
+
+def analyze_with_gemini(image_path: Path, slide_title: Optional[str] = None) -> Optional[dict]:
+    """Analyze image using Gemini API."""
+    response_text = gemini_generate(get_analysis_prompt(slide_title), [image_path])
+    return parse_single_response(response_text) if response_text is not None else None
+
+
+def analyze_with_lmstudio(image_path: Path, model: str, slide_title: Optional[str] = None) -> Optional[dict]:
+    """Analyze image using LM Studio (OpenAI-compatible API)."""
+    response_text = lmstudio_generate(get_analysis_prompt(slide_title), [image_path], model)
+    return parse_single_response(response_text) if response_text is not None else None
+
+
+def analyze_with_ollama(image_path: Path, model: str, slide_title: Optional[str] = None) -> Optional[dict]:
+    """Analyze image using Ollama API."""
+    response_text = ollama_generate(get_analysis_prompt(slide_title), [image_path], model)
+    return parse_single_response(response_text) if response_text is not None else None
+
+
+class UnparsedResponse(dict):
+    """Result built from a response that wasn't valid JSON (the raw text as
+    description). Applied like any result but never written to the
+    analysis cache, so re-extracted decks don't reuse a one-off bad answer."""
+
+
+def parse_json_response(response_text: str) -> Optional[dict | list]:
+    """Parse JSON from model response, handling markdown code blocks.
+
+    Batch responses are JSON arrays; each object in the array gets the
+    same category validation as a single response.
+    """
     try:
         # Handle markdown code blocks
         if response_text.startswith('```'):
@@ -359,16 +697,30 @@ def parse_json_response(response_text: str) -> Optional[dict]:
                 response_text = response_text[4:]
             response_text = response_text.strip()
 
-        result = json.loads(response_text)
+        result = json_loads(response_text)
 
         # Validate category
-        if result.get('category') not in VALID_CATEGORIES:
-            result['category'] = 'other'
+        for item in (result if isinstance(result, list) else [result]):
+            if isinstance(item, dict) and item.get('category') not in VALID_CATEGORIES_SET:
+                item['category'] = 'other'
 
         return result
     except json.JSONDecodeError as e:
         print(f"    Warning: Could not parse JSON: {e}")
-        return {"description": response_text[:500] if response_text else None, "category": "other"}
+        return UnparsedResponse(description=response_text[:500] if response_text else None, category="other")
+
+
+def parse_single_response(response_text: str) -> Optional[dict]:
+    """Parse a one-image response, which must be a JSON object.
+
+    Arrays and bare values are only valid for batch requests; here they
+    count as a failed analysis rather than a result.
+    """
+    result = parse_json_response(response_text)
+    if not isinstance(result, dict):
+        print("    Warning: Expected a JSON object for a single image")
+        return None
+    return result
 
 
 def analyze_image(image_path: Path, backend: str, model: str, slide_title: Optional[str] = None) -> Optional[dict]:
@@ -384,8 +736,224 @@ def analyze_image(image_path: Path, backend: str, model: str, slide_title: Optio
         return None
 
 
+def analyze_image_batch(image_paths: list[Path], backend: str, model: str,
+                        slide_titles: list[Optional[str]]) -> list[Optional[dict]]:
+    """Analyze several images in one request, one result per image.
+
+    Falls back to analyzing each image individually if the batch request
+    fails or the response is not an array with one object per image.
+    """
+    if len(image_paths) == 1:
+        return [analyze_image(image_paths[0], backend, model, slide_titles[0])]
+
+    response_text = generate(get_batch_analysis_prompt(slide_titles), image_paths, backend, model)
+    if response_text is not None:
+        results = parse_json_response(response_text)
+        if (isinstance(results, list) and len(results) == len(image_paths)
+                and all(isinstance(r, dict) for r in results)):
+            return results
+        print(f"    Warning: Batch response did not match {len(image_paths)} images, analyzing individually")
+
+    return [analyze_image(p, backend, model, t) for p, t in zip(image_paths, slide_titles)]
+
+
+@dataclass(slots=True)
+class WorkItem:
+    """An image block in presentation.json and the file it points to."""
+    content: dict
+    image_path: Path
+    slide_title: str
+    already_done: bool
+
+
+def resolve_image_path(src: str, public_dir: Path) -> Path:
+    """Map an image src ('/assets/...', './assets/...' or 'assets/...') to a file under public_dir."""
+    prefix = src[:2]
+    if prefix == './':
+        return public_dir / src[2:]
+    if prefix[:1] == '/':
+        return public_dir / src.lstrip('/')
+    return public_dir / src
+
+
+def collect_image_work(data: dict, public_dir: Path):
+    """Yield a WorkItem for every image block whose file exists, in slide order."""
+    for section in data['sections']:
+        for slide in section['slides']:
+            slide_title = slide.get('title', '')
+
+            for content in slide.get('content', []):
+                if content.get('type') != 'image':
+                    continue
+
+                image_path = resolve_image_path(content.get('src', ''), public_dir)
+                if not image_path.exists():
+                    print(f"  Warning: Image not found: {image_path}")
+                    continue
+
+                already_done = bool(content.get('description') and content.get('category'))
+                yield WorkItem(content, image_path, slide_title, already_done)
+
+
+async def analyze_images_concurrently(work_items: list, backend: str, model: str,
+                                     concurrency: int, batch_size: int, on_results) -> None:
+    """Analyze WorkItems concurrently.
+
+    Work items are grouped into batches of batch_size images per request.
+    Backend calls are blocking HTTP requests, so each batch runs in a worker
+    thread while a semaphore bounds how many are in flight.
+    on_results(batch, results) is called on the event loop as each batch
+    finishes.
+
+    The threads come from a private executor that is shut down without
+    waiting: on Ctrl-C, asyncio.run() would otherwise block in
+    shutdown_default_executor() until every in-flight request (and its
+    retries) finished, before the caller could save progress.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def analyze_batch(batch):
+        async with semaphore:
+            # One write per batch keeps lines from concurrent batches together
+            print("\n".join(
+                f"  Analyzing: {item.content.get('src', '')} (Slide: {item.slide_title[:40]}...)"
+                for item in batch
+            ))
+            results = await loop.run_in_executor(
+                executor,
+                analyze_image_batch,
+                [item.image_path for item in batch],
+                backend,
+                model,
+                [item.slide_title for item in batch]
+            )
+        on_results(batch, results)
+
+    batches = [work_items[i:i + batch_size] for i in range(0, len(work_items), batch_size)]
+    try:
+        await asyncio.gather(*(analyze_batch(batch) for batch in batches))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_gemini_batch_request(item: WorkItem) -> Tuple[dict, int]:
+    """Inline Batch Mode request for one WorkItem, and its approximate payload size.
+
+    The image goes in as raw bytes, like the synchronous path; the SDK does
+    the base64 encoding when it serializes the job.
+    """
+    from google.genai import types
+
+    image_bytes, mime_type = load_image_bytes(item.image_path)
+    request = {
+        "contents": [{
+            "role": "user",
+            "parts": [
+                types.Part.from_text(text=get_analysis_prompt(item.slide_title)),
+                types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+            ],
+        }]
+    }
+    # Inline requests are sent base64-encoded, 4 bytes per 3
+    return request, (len(image_bytes) + 2) // 3 * 4
+
+
+def deliver_gemini_batch_results(batch_job, items: list, on_results) -> None:
+    """Pass a finished Batch Mode job's results to on_results([item], [result]), one image at a time."""
+    if batch_job.state.name != "JOB_STATE_SUCCEEDED":
+        print(f"    Warning: Gemini batch job ended with {batch_job.state.name}: {batch_job.error}")
+        on_results(items, [None] * len(items))
+        return
+
+    responses = batch_job.dest.inlined_responses or []
+    for index, item in enumerate(items):
+        inlined = responses[index] if index < len(responses) else None
+        response = inlined.response if inlined else None
+        if response is None:
+            on_results([item], [None])
+            continue
+
+        if response.usage_metadata:
+            token_usage.add(
+                response.usage_metadata.prompt_token_count or 0,
+                response.usage_metadata.candidates_token_count or 0,
+                response.usage_metadata.cached_content_token_count or 0
+            )
+        on_results([item], [parse_single_response((response.text or "").strip())])
+
+
+def run_gemini_batch_job(work_items: list, model: str, on_results) -> None:
+    """Analyze WorkItems with Gemini Batch Mode (asynchronous, half the per-token price).
+
+    Requests are submitted inline as one or more jobs that stay under the
+    inline size limit. All jobs are submitted before polling, so they queue
+    in parallel; as each finishes, on_results([item], [result]) is called
+    per image. Batch jobs can take minutes to hours; images whose request
+    failed are left unanalyzed.
+    """
+    try:
+        from google.genai import types  # noqa: F401
+    except ImportError:
+        print("Error: google-genai required for Gemini backend")
+        print("Install with: pip install google-genai")
+        return
+
+    api_key = os.environ.get('GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
+    if not api_key:
+        print("Error: GEMINI_API_KEY or GOOGLE_API_KEY environment variable required")
+        return
+    client = get_gemini_client(api_key)
+
+    # Split into jobs that fit the inline request limit
+    jobs = [[]]
+    job_bytes = 0
+    for item in work_items:
+        request, size = build_gemini_batch_request(item)
+        if jobs[-1] and job_bytes + size > GEMINI_BATCH_MAX_INLINE_BYTES:
+            jobs.append([])
+            job_bytes = 0
+        jobs[-1].append((item, request))
+        job_bytes += size
+
+    pending = []  # (batch job, its WorkItems) still running
+    for job_index, job in enumerate(jobs, 1):
+        if not job:
+            continue
+        items = [item for item, _ in job]
+        try:
+            batch_job = call_with_retries(
+                client.batches.create,
+                model=model,
+                src=[request for _, request in job],
+                config={"display_name": f"ppt2handout-images-{job_index}"},
+            )
+        except Exception as e:
+            print(f"    Warning: Gemini batch job submission failed: {e}")
+            on_results(items, [None] * len(items))
+            continue
+
+        print(f"  Submitted batch job {batch_job.name} ({len(job)} images)")
+        pending.append((batch_job, items))
+
+    if pending:
+        print(f"  Waiting for {len(pending)} batch job(s)...")
+    while pending:
+        time.sleep(GEMINI_BATCH_POLL_SECONDS)
+        still_running = []
+        for batch_job, items in pending:
+            batch_job = call_with_retries(client.batches.get, name=batch_job.name)
+            print(f"    {batch_job.name}: {batch_job.state.name}", flush=True)
+            if batch_job.state.name in GEMINI_BATCH_DONE_STATES:
+                deliver_gemini_batch_results(batch_job, items, on_results)
+            else:
+                still_running.append((batch_job, items))
+        pending = still_running
+
+
 def main():
-    global total_input_tokens, total_output_tokens
+    global MAX_IMAGE_DIM, JPEG_QUALITY
 
     parser = argparse.ArgumentParser(
         description="Analyze images in presentation.json using vision models",
@@ -409,8 +977,28 @@ Examples:
     parser.add_argument("--backend", choices=["lmstudio", "ollama", "gemini"], help="Backend to use")
     parser.add_argument("--model", help="Model ID to use (required for lmstudio/ollama)")
     parser.add_argument("--json", action="store_true", help="Output --list results as JSON")
+    parser.add_argument("--concurrency", type=int,
+                        help="Number of images analyzed in parallel "
+                             "(default: 8 for gemini, 4 for lmstudio, 2 for ollama)")
+    parser.add_argument("--batch-size", type=int, default=4,
+                        help="Number of images sent to the model per request (default: 4)")
+    parser.add_argument("--max-dim", type=int, default=MAX_IMAGE_DIM,
+                        help=f"Downscale images whose longest side exceeds this many pixels "
+                             f"before upload, 0 to disable (default: {MAX_IMAGE_DIM})")
+    parser.add_argument("--jpeg-quality", type=int, default=JPEG_QUALITY,
+                        help=f"JPEG quality for downscaled photos (default: {JPEG_QUALITY})")
+    parser.add_argument("--checkpoint-every", type=int, default=20,
+                        help="Save presentation.json after every N analyzed images, "
+                             "0 to save only at the end (default: 20)")
+    parser.add_argument("--gemini-batch", action="store_true",
+                        help="Submit Gemini requests as a Batch Mode job: half the price, "
+                             "but results can take minutes to hours")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore analysis_cache.json and re-analyze every image")
 
     args = parser.parse_args()
+    MAX_IMAGE_DIM = args.max_dim
+    JPEG_QUALITY = args.jpeg_quality
 
     # List mode
     if args.list:
@@ -443,6 +1031,7 @@ Examples:
     site_dir = Path(args.site_dir)
     json_path = site_dir / "src" / "data" / "presentation.json"
     stats_path = site_dir / "src" / "data" / "processingStats.json"
+    cache_path = site_dir / "src" / "data" / "analysis_cache.json"
 
     if not json_path.exists():
         print(f"Error: presentation.json not found at {json_path}")
@@ -473,8 +1062,8 @@ Examples:
             print("Run with --list to see requirements.")
             sys.exit(1)
     elif backend in ["lmstudio", "ollama"] and not model:
-        # Need to get model list
-        backends = list_available_backends()
+        # Need to get model list, but only from the requested backend
+        backends = list_available_backends(only=backend)
         if backend not in backends:
             print(f"Error: {backend} is not available")
             sys.exit(1)
@@ -489,94 +1078,151 @@ Examples:
 
     # Load presentation
     print("Loading presentation.json...")
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = read_json(json_path)
     print(f"Loaded {len(data.get('sections', []))} sections")
 
     public_dir = site_dir / "public"
 
+    # Results from previous runs, keyed by image SHA-256, backend, model and prompt
+    analysis_cache = {} if args.no_cache else load_analysis_cache(cache_path)
+    image_hashes = {}
+
     # Process all sections and slides
     images_processed = 0
     images_skipped = 0
+    images_cached = 0
+    unique_images_done = 0
+    last_checkpoint = 0
     quotes_found = 0
-    category_counts = {cat: 0 for cat in VALID_CATEGORIES}
+    failed_images = []  # srcs whose analysis failed after retries, for targeted reruns
+    category_counts = Counter()
     start_time = datetime.now()
 
-    for section in data['sections']:
-        for slide in section['slides']:
-            slide_title = slide.get('title', '')
+    def apply_result(content, result, log):
+        """Copy an analysis result into an image block; returns its category.
 
-            for content in slide.get('content', []):
-                if content.get('type') == 'image':
-                    src = content.get('src', '')
-
-                    # Handle different path formats
-                    if src.startswith('/'):
-                        image_path = public_dir / src.lstrip('/')
-                    elif src.startswith('./'):
-                        image_path = public_dir / src[2:]
-                    else:
-                        image_path = public_dir / src
-
-                    if not image_path.exists():
-                        print(f"  Warning: Image not found: {image_path}")
-                        continue
-
-                    # Skip if already analyzed
-                    if content.get('description') and content.get('category'):
-                        print(f"  Skipping (already analyzed): {src}")
-                        images_skipped += 1
-                        continue
-
-                    print(f"  Analyzing: {src} (Slide: {slide_title[:40]}...)")
-                    sys.stdout.flush()
-
-                    result = analyze_image(image_path, backend, model, slide_title)
-
-                    if result:
-                        content['description'] = result.get('description')
-                        content['category'] = result.get('category', 'other')
-
-                        category_counts[content['category']] = category_counts.get(content['category'], 0) + 1
-
-                        if result.get('has_quote') and result.get('quote_text'):
-                            content['quote_text'] = result.get('quote_text')
-                            content['quote_attribution'] = result.get('quote_attribution')
-                            quotes_found += 1
-                            print(f"    -> [{content['category']}] Quote: \"{result['quote_text'][:50]}...\"")
-                        elif result.get('description'):
-                            print(f"    -> [{content['category']}] {result['description'][:60]}...")
-
-                        sys.stdout.flush()
-
-                    images_processed += 1
-
-    end_time = datetime.now()
-    duration = (end_time - start_time).total_seconds()
-
-    # Save updated presentation
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-    # Generate processing stats
-    stats = {
-        "processedAt": end_time.isoformat(),
-        "backend": backend,
-        "model": model,
-        "imagesProcessed": images_processed,
-        "imagesSkipped": images_skipped,
-        "quotesExtracted": quotes_found,
-        "categoryCounts": {k: v for k, v in category_counts.items() if v > 0},
-        "tokensUsed": {
-            "input": total_input_tokens,
-            "output": total_output_tokens,
-            "total": total_input_tokens + total_output_tokens
-        },
-        "durationSeconds": round(duration, 2)
-    }
+        Progress lines are appended to log so callers can print them in one write.
+        """
+        nonlocal quotes_found
+
+        if result:
+            content['description'] = result.get('description')
+            content['category'] = result.get('category', 'other')
+
+            if result.get('has_quote') and result.get('quote_text'):
+                content['quote_text'] = result.get('quote_text')
+                content['quote_attribution'] = result.get('quote_attribution')
+                quotes_found += 1
+                log.append(f"    -> [{content['category']}] Quote: \"{result['quote_text'][:50]}...\"")
+            elif result.get('description'):
+                log.append(f"    -> [{content['category']}] {result['description'][:60]}...")
 
-    with open(stats_path, 'w', encoding='utf-8') as f:
-        json.dump(stats, f, indent=2)
+            return content['category']
+        return None
+
+    def build_stats():
+        """Processing stats for the run so far."""
+        now = datetime.now()
+        return {
+            "processedAt": now.isoformat(),
+            "backend": backend,
+            "model": model,
+            "imagesProcessed": images_processed,
+            "imagesSkipped": images_skipped,
+            "imagesCached": images_cached,
+            "imagesFailed": len(failed_images),
+            "failedImages": failed_images,
+            "quotesExtracted": quotes_found,
+            # Counter only holds categories that were actually seen
+            "categoryCounts": dict(category_counts),
+            "tokensUsed": token_usage.as_dict(),
+            "uploadBytesSaved": sum(downscale_bytes_saved.values()),
+            "durationSeconds": round((now - start_time).total_seconds(), 2)
+        }
+
+    def save_checkpoint():
+        write_json(json_path, data)
+        write_json(stats_path, build_stats())
+        if not args.no_cache:
+            write_json(cache_path, analysis_cache)
+
+    def handle_results(batch, results):
+        nonlocal images_processed, unique_images_done, last_checkpoint
+        categories = []
+        log = []
+        for item, result in zip(batch, results):
+            image_hash = image_hashes[item.image_path]
+            if result and not isinstance(result, UnparsedResponse):
+                analysis_cache[analysis_cache_key(image_hash, backend, model)] = result
+            for target in (item, *duplicates[image_hash]):
+                categories.append(apply_result(target.content, result, log))
+                if not result:
+                    failed_images.append(target.content.get('src', ''))
+                images_processed += 1
+        category_counts.update(category for category in categories if category)
+        unique_images_done += len(batch)
+        log.append(f"  Progress: {unique_images_done}/{len(work_items)} images")
+        print("\n".join(log), flush=True)
+
+        # Periodically persist progress so an interrupted run loses at most N results
+        if args.checkpoint_every > 0 and images_processed - last_checkpoint >= args.checkpoint_every:
+            save_checkpoint()
+            last_checkpoint = images_processed
+
+    # Collect images that still need analysis
+    work_items = []
+    duplicates = {}  # image hash -> further WorkItems with the same image
+    for item in collect_image_work(data, public_dir):
+        src = item.content.get('src', '')
+
+        if item.already_done:
+            print(f"  Skipping (already analyzed): {src}")
+            images_skipped += 1
+            continue
+
+        if item.image_path not in image_hashes:
+            image_hashes[item.image_path] = file_sha256(item.image_path)
+
+        image_hash = image_hashes[item.image_path]
+        cached = analysis_cache.get(analysis_cache_key(image_hash, backend, model))
+        if cached:
+            log = [f"  Cached: {src}"]
+            category_counts[apply_result(item.content, cached, log)] += 1
+            print("\n".join(log))
+            images_cached += 1
+            continue
+
+        # Identical images elsewhere in the deck share one analysis
+        if image_hash in duplicates:
+            print(f"  Duplicate (analyzed once): {src}")
+            duplicates[image_hash].append(item)
+            continue
+
+        duplicates[image_hash] = []
+        work_items.append(item)
+
+    try:
+        if args.gemini_batch and backend == "gemini" and work_items:
+            print(f"Analyzing {len(work_items)} images with Gemini Batch Mode...")
+            run_gemini_batch_job(work_items, model, handle_results)
+        else:
+            concurrency = max(1, args.concurrency or DEFAULT_CONCURRENCY.get(backend, 1))
+            batch_size = max(1, args.batch_size)
+            print(f"Analyzing {len(work_items)} images "
+                  f"({batch_size} per request, {concurrency} requests in parallel)...")
+            asyncio.run(analyze_images_concurrently(work_items, backend, model, concurrency,
+                                                    batch_size, handle_results))
+    except KeyboardInterrupt:
+        # Keep everything analyzed so far; a re-run skips those images
+        save_checkpoint()
+        print(f"\nInterrupted: saved {images_processed} analyzed images to {json_path}", flush=True)
+        # Exit without joining worker threads still blocked in HTTP requests;
+        # their results would be discarded anyway
+        os._exit(130)
+
+    # Save updated presentation, stats and cache
+    save_checkpoint()
+    duration = (datetime.now() - start_time).total_seconds()
 
     print()
     print("=" * 50)
@@ -585,22 +1231,28 @@ Examples:
     print(f"Backend: {backend} ({model})")
     print(f"Images analyzed: {images_processed}")
     print(f"Images skipped: {images_skipped}")
+    print(f"Images from cache: {images_cached}")
+    if failed_images:
+        print(f"Images failed: {len(failed_images)} (re-run to retry them)")
     print(f"Quotes extracted: {quotes_found}")
     print(f"Duration: {duration:.1f} seconds")
     print()
     print("Category breakdown:")
-    for cat, count in sorted(category_counts.items(), key=lambda x: -x[1]):
-        if count > 0:
-            print(f"  {cat}: {count}")
+    for cat, count in category_counts.most_common():
+        print(f"  {cat}: {count}")
     print()
-    if total_input_tokens or total_output_tokens:
+    if token_usage.total:
         print(f"Token usage:")
-        print(f"  Input tokens: {total_input_tokens:,}")
-        print(f"  Output tokens: {total_output_tokens:,}")
-        print(f"  Total tokens: {total_input_tokens + total_output_tokens:,}")
+        print(f"  Input tokens: {token_usage.input:,}")
+        print(f"  Output tokens: {token_usage.output:,}")
+        if token_usage.cached:
+            print(f"  Cached input tokens: {token_usage.cached:,}")
+        print(f"  Total tokens: {token_usage.total:,}")
         print()
     print(f"Updated: {json_path}")
     print(f"Stats saved: {stats_path}")
+    if not args.no_cache:
+        print(f"Cache saved: {cache_path}")
 
 
 if __name__ == "__main__":
@@ -9,6 +9,12 @@ import json
 from pathlib import Path
 import re
 
+# Optional: orjson for faster JSON encoding/decoding (falls back to stdlib json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Category detection patterns (case-insensitive)
 CATEGORY_PATTERNS = {
     'tweet': [
@@ -63,30 +69,56 @@ CATEGORY_PATTERNS = {
     ]
 }
 
+# One alternation per category, compiled once, so each category is a single
+# regex scan instead of a Python loop over its patterns
+# (Not fused into one regex across categories: a single alternation returns the
+# leftmost match in the text, whereas categories are checked in priority order.)
+COMPILED_CATEGORY_PATTERNS = {
+    category: re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+    for category, patterns in CATEGORY_PATTERNS.items()
+}
+
+
+def read_json(path: Path):
+    """Read a JSON file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def write_json(path: Path, obj) -> None:
+    """Write obj to path as 2-space indented UTF-8 JSON."""
+    if orjson:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+
 
 def categorize_description(description: str) -> str:
     """Determine category based on description keywords."""
     if not description:
         return 'other'
 
-    desc_lower = description.lower()
-
-    # Check each category's patterns
-    for category, patterns in CATEGORY_PATTERNS.items():
-        for pattern in patterns:
-            if re.search(pattern, desc_lower):
-                return category
+    # Check each category's patterns (first matching category wins)
+    for category, regex in COMPILED_CATEGORY_PATTERNS.items():
+        if regex.search(description):
+            return category
 
     return 'other'
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python categorize-from-descriptions.py <site_directory>")
+    args = [arg for arg in sys.argv[1:] if arg != '--quiet']
+    quiet = len(args) < len(sys.argv) - 1  # --quiet: no per-image output
+
+    if not args:
+        print("Usage: python categorize-from-descriptions.py <site_directory> [--quiet]")
         print("Example: python categorize-from-descriptions.py /path/to/threeyearsafterchatgpt")
         sys.exit(1)
 
-    site_dir = Path(sys.argv[1])
+    site_dir = Path(args[0])
     entities_path = site_dir / "src" / "data" / "entities.json"
 
     if not entities_path.exists():
@@ -95,8 +127,7 @@ def main():
 
     # Load entities
     print(f"Loading {entities_path}...")
-    with open(entities_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = read_json(entities_path)
 
     images = data.get('images', [])
     if not images:
@@ -110,24 +141,23 @@ def main():
     category_counts = {}
 
     for img in images:
-        description = img.get('description', '')
-
         # Skip if already has a category
         if img.get('category'):
             category_counts[img['category']] = category_counts.get(img['category'], 0) + 1
             continue
 
         # Categorize based on description
-        category = categorize_description(description)
+        category = categorize_description(img.get('description', ''))
         img['category'] = category
         category_counts[category] = category_counts.get(category, 0) + 1
         categorized += 1
 
-        print(f"  [{category}] {img.get('src', 'unknown')[:50]}...")
+        if not quiet:
+            print(f"  [{category}] {img.get('src', 'unknown')[:50]}...")
 
-    # Save updated entities
-    with open(entities_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # Save updated entities (nothing to write when every image was already categorized)
+    if categorized:
+        write_json(entities_path, data)
 
     print()
     print("=" * 50)
@@ -139,7 +169,7 @@ def main():
     for cat, count in sorted(category_counts.items(), key=lambda x: -x[1]):
         print(f"  {cat}: {count}")
     print()
-    print(f"Updated: {entities_path}")
+    print(f"Updated: {entities_path}" if categorized else f"Unchanged: {entities_path}")
 
 
 if __name__ == "__main__":
@@ -9,6 +9,12 @@ import json
 from pathlib import Path
 import re
 
+# Optional: orjson for faster JSON encoding/decoding (falls back to stdlib json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Category detection patterns (case-insensitive)
 CATEGORY_PATTERNS = {
     'tweet': [
@@ -56,29 +62,64 @@ CATEGORY_PATTERNS = {
     ]
 }
 
+# One alternation per category, compiled once, so each category is a single
+# regex scan instead of a Python loop over its patterns
+# (Not fused into one regex across categories: a single alternation returns the
+# leftmost match in the text, whereas categories are checked in priority order.)
+COMPILED_CATEGORY_PATTERNS = {
+    category: re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+    for category, patterns in CATEGORY_PATTERNS.items()
+}
+
+
+def read_json(path: Path):
+    """Read a JSON file."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def write_json(path: Path, obj) -> None:
+    """Write obj to path as 2-space indented UTF-8 JSON."""
+    if orjson:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+
 
 def categorize_description(description: str) -> str:
     """Determine category based on description keywords."""
     if not description:
         return 'other'
 
-    desc_lower = description.lower()
-
-    # Check each category's patterns
-    for category, patterns in CATEGORY_PATTERNS.items():
-        for pattern in patterns:
-            if re.search(pattern, desc_lower):
-                return category
+    # Check each category's patterns (first matching category wins)
+    for category, regex in COMPILED_CATEGORY_PATTERNS.items():
+        if regex.search(description):
+            return category
 
     return 'other'
 
 
+def iter_image_contents(data: dict):
+    """Yield every image content block in presentation.json, in slide order."""
+    for section in data['sections']:
+        for slide in section['slides']:
+            for content in slide.get('content', []):
+                if content.get('type') == 'image':
+                    yield content
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python categorize-presentation-images.py <site_directory>")
+    args = [arg for arg in sys.argv[1:] if arg != '--quiet']
+    quiet = len(args) < len(sys.argv) - 1  # --quiet: no per-image output
+
+    if not args:
+        print("Usage: python categorize-presentation-images.py <site_directory> [--quiet]")
         sys.exit(1)
 
-    site_dir = Path(sys.argv[1])
+    site_dir = Path(args[0])
     json_path = site_dir / "src" / "data" / "presentation.json"
 
     if not json_path.exists():
@@ -87,8 +128,7 @@ def main():
 
     # Load presentation
     print(f"Loading {json_path}...")
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = read_json(json_path)
 
     print(f"Loaded {len(data.get('sections', []))} sections")
 
@@ -97,30 +137,25 @@ def main():
     skipped = 0
     category_counts = {}
 
-    for section in data['sections']:
-        for slide in section['slides']:
-            for content in slide.get('content', []):
-                if content.get('type') == 'image':
-                    description = content.get('description', '')
-
-                    # Skip if already has a category
-                    if content.get('category'):
-                        skipped += 1
-                        category_counts[content['category']] = category_counts.get(content['category'], 0) + 1
-                        continue
+    for content in iter_image_contents(data):
+        # Skip if already has a category
+        if content.get('category'):
+            skipped += 1
+            category_counts[content['category']] = category_counts.get(content['category'], 0) + 1
+            continue
 
-                    # Categorize based on description
-                    category = categorize_description(description)
-                    content['category'] = category
-                    category_counts[category] = category_counts.get(category, 0) + 1
-                    categorized += 1
+        # Categorize based on description
+        category = categorize_description(content.get('description', ''))
+        content['category'] = category
+        category_counts[category] = category_counts.get(category, 0) + 1
+        categorized += 1
 
-                    src = content.get('src', 'unknown')
-                    print(f"  [{category}] {src}")
+        if not quiet:
+            print(f"  [{category}] {content.get('src', 'unknown')}")
 
-    # Save updated presentation
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    # Save updated presentation (nothing to write when every image was already categorized)
+    if categorized:
+        write_json(json_path, data)
 
     print()
     print("=" * 50)
@@ -133,7 +168,7 @@ def main():
     for cat, count in sorted(category_counts.items(), key=lambda x: -x[1]):
         print(f"  {cat}: {count}")
     print()
-    print(f"Updated: {json_path}")
+    print(f"Updated: {json_path}" if categorized else f"Unchanged: {json_path}")
 
 
 if __name__ == "__main__":
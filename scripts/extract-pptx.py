@@ -49,94 +49,156 @@ import os
 import json
 import uuid
 import re
+import struct
 import base64
+import hashlib
+import importlib.util
+import io
+import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
+from itertools import repeat
 from pathlib import Path
 
 try:
     from pptx import Presentation
     from pptx.util import Inches, Pt
     from pptx.enum.shapes import MSO_SHAPE_TYPE
-    from pptx.enum.dml import MSO_THEME_COLOR
+    from pptx.enum.dml import MSO_FILL, MSO_THEME_COLOR
+    from pptx.oxml.ns import qn
+    from lxml import etree
 except ImportError:
     print("Error: python-pptx is required. Install with: pip install python-pptx")
     sys.exit(1)
 
-# Optional: Claude API for image analysis
-ANTHROPIC_AVAILABLE = False
-anthropic_client = None
+# Optional: orjson for faster JSON encoding/decoding (falls back to stdlib json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: pybase64 for SIMD base64 encoding of images sent for analysis
 try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
+    import pybase64
 except ImportError:
-    pass
+    pybase64 = None
+
+# Optional: Claude API for image analysis. Only imported by init_anthropic():
+# the SDK is slow to import and most runs (and every slide worker) never use it
+ANTHROPIC_AVAILABLE = importlib.util.find_spec('anthropic') is not None
+anthropic_client = None
 
 # Global flag for image analysis
 ANALYZE_IMAGES = False
+# Claude requests in flight at once when analyzing images (--max-concurrency)
+ANALYSIS_THREADS = 8
+# Retries for rate-limited (429) and 5xx responses; the SDK backs off
+# exponentially and honours retry-after
+ANALYSIS_MAX_RETRIES = 5
+# Images sent together in one Claude request (falls back to one at a time if
+# the answer doesn't contain one result per image)
+ANALYSIS_IMAGES_PER_REQUEST = 4
+
+# Parallel slide extraction: each worker process opens its own copy of the
+# presentation, so only use as many workers as keep them busy
+MIN_SLIDES_PER_WORKER = 4
+_worker_prs = None
+
+# Media files are written on background threads so disk I/O overlaps with
+# parsing the rest of the deck; flush_media_writes() waits for them
+MEDIA_WRITE_THREADS = 8
+_media_writer = None
+_pending_writes = []
+# Media files written so far, so the summary counts don't rescan media_dir
+_written_media = set()
+# (media_dir, content hash) -> filename this process already wrote
+_media_by_digest = {}
+# (media_dir, layout part name) -> extract_layout_background() result
+_layout_backgrounds = {}
+
+
+def _write_bytes(filepath, data):
+    """Write data with raw os calls; the blob is already in memory, so a
+    buffered file object would only add a copy."""
+    fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def write_media_file(filepath, data):
+    """Queue bytes to be written to filepath on a background thread."""
+    global _media_writer
+    if _media_writer is None:
+        _media_writer = ThreadPoolExecutor(max_workers=MEDIA_WRITE_THREADS)
+    future = _media_writer.submit(_write_bytes, filepath, data)
+    _pending_writes.append((Path(filepath), future))
+
+
+def save_media_blob(media_dir, filename, blob):
+    """Write blob to media_dir/filename unless this process already wrote the
+    same bytes there; returns the filename that holds them.
+
+    Images repeated across slides handled by different worker processes are
+    merged afterwards by dedupe_media_files().
+    """
+    key = (media_dir, hashlib.sha1(blob).digest())
+    existing = _media_by_digest.get(key)
+    if existing:
+        return existing
+    _media_by_digest[key] = filename
+    write_media_file(media_dir / filename, blob)
+    return filename
+
+
+def flush_media_writes():
+    """Wait for queued media writes, warning about any that failed.
+
+    Returns the paths written since the last flush.
+    """
+    written = []
+    while _pending_writes:
+        path, future = _pending_writes.pop()
+        try:
+            future.result()
+        except OSError as e:
+            print(f"  Warning: Could not write media file: {e}")
+        else:
+            written.append(path)
+    _written_media.update(written)
+    return written
 
 
 def init_anthropic():
     """Initialize Anthropic client if API key is available."""
     global anthropic_client
     if ANTHROPIC_AVAILABLE and os.environ.get('ANTHROPIC_API_KEY'):
-        anthropic_client = anthropic.Anthropic()
+        try:
+            import anthropic
+        except ImportError as e:
+            print(f"Warning: Could not import anthropic: {e}")
+            return False
+        # One client (and connection pool) serves every analysis thread; with
+        # the optional h2 package installed, requests share HTTP/2 connections
+        http_client = anthropic.DefaultHttpxClient(http2=importlib.util.find_spec('h2') is not None)
+        anthropic_client = anthropic.Anthropic(http_client=http_client, max_retries=ANALYSIS_MAX_RETRIES)
         return True
     return False
 
 
-def analyze_image(image_blob, ext, slide_title=None):
-    """
-    Analyze image using Claude's vision API.
-    Returns a dict with description and optional quote extraction.
-    """
-    if not anthropic_client:
-        return None
-
-    # Map extensions to media types
-    media_type_map = {
-        'png': 'image/png',
-        'jpg': 'image/jpeg',
-        'jpeg': 'image/jpeg',
-        'gif': 'image/gif',
-        'webp': 'image/webp'
-    }
+# Static part of the image analysis prompt, sent as a cacheable system block
+IMAGE_ANALYSIS_INSTRUCTIONS = """You analyze images from presentation slides. Respond in JSON format:
 
-    media_type = media_type_map.get(ext.lower())
-    if not media_type:
-        return None
-
-    try:
-        # Encode image to base64
-        image_data = base64.standard_b64encode(image_blob).decode('utf-8')
-
-        context = f" from slide '{slide_title}'" if slide_title else ""
-
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=500,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": image_data
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": f"""Analyze this presentation slide image{context}. Respond in JSON format:
-
-{{
+{
   "description": "Brief description of what the image shows",
   "has_quote": true/false,
   "quote_text": "The verbatim quote/message text if present",
   "quote_attribution": "Who said it (name, @handle, title)"
-}}
+}
 
 Focus on:
 1. Tweets - extract the full tweet text and @handle
@@ -145,44 +207,293 @@ Focus on:
 4. Social media posts - extract the post content and author
 
 Examples:
-- Tweet: {{"description": "Tweet screenshot", "has_quote": true, "quote_text": "ChatGPT launched on wednesday. today it crossed 1 million users!", "quote_attribution": "Sam Altman (@sama)"}}
-- Slack: {{"description": "Slack message screenshot", "has_quote": true, "quote_text": "ChatGPT went viral. 100k people have tried this so far.", "quote_attribution": "Evan Morikawa, OpenAI"}}
-- Chart: {{"description": "Bar chart showing AI adoption rates", "has_quote": false}}
+- Tweet: {"description": "Tweet screenshot", "has_quote": true, "quote_text": "ChatGPT launched on wednesday. today it crossed 1 million users!", "quote_attribution": "Sam Altman (@sama)"}
+- Slack: {"description": "Slack message screenshot", "has_quote": true, "quote_text": "ChatGPT went viral. 100k people have tried this so far.", "quote_attribution": "Evan Morikawa, OpenAI"}
+- Chart: {"description": "Bar chart showing AI adoption rates", "has_quote": false}
 
 Return ONLY valid JSON, no other text."""
-                        }
-                    ]
-                }
-            ]
-        )
-
-        # Parse JSON response
-        response_text = response.content[0].text.strip()
-        # Handle potential markdown code blocks
-        if response_text.startswith('```'):
-            response_text = response_text.split('```')[1]
-            if response_text.startswith('json'):
-                response_text = response_text[4:]
-            response_text = response_text.strip()
-
-        result = json.loads(response_text)
-        return result
 
+
+# Image extensions Claude accepts, mapped to media types
+IMAGE_MEDIA_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp'
+}
+
+# Message Batches API polling
+ANALYSIS_BATCH_POLL_SECONDS = 30
+
+# Claude resizes images whose long edge exceeds 1568px anyway, so larger
+# images are downscaled before upload to save bandwidth
+ANALYSIS_MAX_IMAGE_DIM = 1568
+ANALYSIS_JPEG_QUALITY = 85
+# Images within the size limit are still re-encoded above this many bytes
+# (e.g. uncompressed photos saved as PNG), keeping well under the 5MB API cap
+ANALYSIS_MAX_IMAGE_BYTES = 1_000_000
+
+
+def downscale_for_analysis(image_blob, media_type):
+    """Return (blob, media_type), downscaled if larger than ANALYSIS_MAX_IMAGE_DIM.
+
+    Images within the limits (or when Pillow is unavailable) are sent as-is.
+    Downscaled images are re-encoded as PNG when they have transparency or
+    a small palette (typical for screenshots), otherwise as JPEG. Oversized
+    files that need no resizing keep the original if re-encoding doesn't help.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return image_blob, media_type
+
+    try:
+        with Image.open(io.BytesIO(image_blob)) as img:
+            resized = max(img.size) > ANALYSIS_MAX_IMAGE_DIM
+            if not resized and len(image_blob) < ANALYSIS_MAX_IMAGE_BYTES:
+                return image_blob, media_type
+
+            if resized:
+                img.thumbnail((ANALYSIS_MAX_IMAGE_DIM, ANALYSIS_MAX_IMAGE_DIM), Image.LANCZOS,
+                              reducing_gap=2.0)
+            buffer = io.BytesIO()
+            if img.mode in ("RGBA", "LA", "P", "1") or img.getcolors(256):
+                img.save(buffer, format="PNG", optimize=not resized)
+                new_type = "image/png"
+            else:
+                img.convert("RGB").save(buffer, format="JPEG", quality=ANALYSIS_JPEG_QUALITY)
+                new_type = "image/jpeg"
+            if not resized and buffer.tell() >= len(image_blob):
+                return image_blob, media_type
+            return buffer.getvalue(), new_type
+    except (OSError, ValueError) as e:
+        print(f"    Warning: Could not downscale image for analysis, sending original: {e}")
+        return image_blob, media_type
+
+
+def image_content_block(image_blob, ext):
+    """Return a base64 image content block, or None if the format is not supported."""
+    media_type = IMAGE_MEDIA_TYPES.get(ext.lower())
+    if not media_type:
+        return None
+    image_blob, media_type = downscale_for_analysis(image_blob, media_type)
+
+    # Encode image to base64 (base64 output is pure ASCII)
+    if pybase64:
+        image_data = pybase64.b64encode_as_string(image_blob)
+    else:
+        image_data = base64.standard_b64encode(image_blob).decode('ascii')
+
+    return {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": media_type,
+            "data": image_data
+        }
+    }
+
+
+def _analysis_params(content, max_tokens):
+    """messages.create() parameters for an analysis request with the given user content."""
+    return {
+        "model": "claude-sonnet-4-20250514",
+        "max_tokens": max_tokens,
+        # Identical for every image, so marked cacheable. Anthropic only caches
+        # prefixes of at least 1024 tokens for Sonnet; below that the marker
+        # is ignored, so it takes effect once the instructions grow
+        "system": [
+            {
+                "type": "text",
+                "text": IMAGE_ANALYSIS_INSTRUCTIONS,
+                "cache_control": {"type": "ephemeral"}
+            }
+        ],
+        "messages": [
+            {
+                "role": "user",
+                "content": content
+            }
+        ]
+    }
+
+
+def build_analysis_request(image_blob, ext, slide_title=None):
+    """Return messages.create() parameters for analyzing one image, or None
+    if the format is not supported."""
+    image_block = image_content_block(image_blob, ext)
+    if not image_block:
+        return None
+
+    context = f" from slide '{slide_title}'" if slide_title else ""
+    return _analysis_params([
+        image_block,
+        {
+            "type": "text",
+            "text": f"Analyze this presentation slide image{context}."
+        }
+    ], max_tokens=500)
+
+
+def build_multi_image_request(images):
+    """Return messages.create() parameters for analyzing several images in
+    one request. images is a list of (image_blob, ext, slide_title) in a
+    supported format."""
+    content = [image_content_block(blob, ext) for blob, ext, _ in images]
+    n = len(images)
+    image_lines = "\n".join(
+        f"- Image {i}: from slide '{title}'" if title else f"- Image {i}"
+        for i, (_, _, title) in enumerate(images, 1)
+    )
+    content.append({
+        "type": "text",
+        "text": f"Analyze these {n} presentation slide images, given in order:\n{image_lines}\n\n"
+                f"Return ONLY a valid JSON array with exactly {n} objects in the format above, "
+                f"one per image, in the same order as the images. No other text."
+    })
+    return _analysis_params(content, max_tokens=500 * n)
+
+
+class UnparsedResponse(dict):
+    """Analysis built from an answer that wasn't valid JSON (the raw text as
+    description). Used like any result but never cached, so the image is
+    sent again on the next run."""
+
+
+def parse_analysis_response(response_text):
+    """Parse Claude's JSON answer, falling back to using the raw text as the description."""
+    response_text = response_text.strip()
+    raw_text = response_text
+    # Handle potential markdown code blocks
+    if response_text.startswith('```'):
+        response_text = response_text.split('```')[1]
+        if response_text.startswith('json'):
+            response_text = response_text[4:]
+        response_text = response_text.strip()
+
+    try:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(response_text) if orjson else json.loads(response_text)
     except json.JSONDecodeError as e:
         print(f"    Warning: Could not parse image analysis JSON: {e}")
         # Return basic description if JSON parsing fails
-        return {"description": response.content[0].text.strip() if response else None}
+        return UnparsedResponse(description=raw_text or None)
+
+
+def analyze_image(image_blob, ext, slide_title=None):
+    """
+    Analyze image using Claude's vision API.
+    Returns a dict with description and optional quote extraction.
+    """
+    if not anthropic_client:
+        return None
+
+    params = build_analysis_request(image_blob, ext, slide_title)
+    if not params:
+        return None
+
+    try:
+        response = anthropic_client.messages.create(**params)
+        analysis = parse_analysis_response(response.content[0].text)
     except Exception as e:
         print(f"    Warning: Image analysis failed: {e}")
         return None
+    if not isinstance(analysis, dict):
+        # e.g. a JSON array or bare string; callers read fields with .get()
+        print("    Warning: Image analysis response was not a JSON object")
+        return None
+    return analysis
+
+
+def analyze_image_group(images):
+    """Analyze several images in one request, one result per image.
+
+    images is a list of (image_blob, ext, slide_title) in supported formats.
+    Falls back to analyzing each image individually if the request fails or
+    the response is not an array with one object per image.
+    """
+    if len(images) == 1:
+        return [analyze_image(*images[0])]
+    if not anthropic_client:
+        return [None] * len(images)
+
+    try:
+        response = anthropic_client.messages.create(**build_multi_image_request(images))
+        results = parse_analysis_response(response.content[0].text)
+    except Exception as e:
+        print(f"    Warning: Image analysis failed: {e}")
+        results = None
+    if (isinstance(results, list) and len(results) == len(images)
+            and all(isinstance(r, dict) for r in results)):
+        return results
+
+    print(f"    Warning: Response did not match {len(images)} images, analyzing individually")
+    return [analyze_image(*image) for image in images]
+
+
+def analyze_images_in_batch(requests):
+    """Analyze images with the Message Batches API (half price, asynchronous).
+
+    requests maps a custom id to build_analysis_request() parameters.
+    Polls until the batch has ended and returns {custom_id: analysis} for
+    the requests that succeeded.
+    """
+    if not anthropic_client or not requests:
+        return {}
+
+    try:
+        batch = anthropic_client.messages.batches.create(requests=[
+            {"custom_id": custom_id, "params": params} for custom_id, params in requests.items()
+        ])
+        print(f"  Submitted batch {batch.id} ({len(requests)} images), waiting for results...", flush=True)
+        while batch.processing_status != "ended":
+            time.sleep(ANALYSIS_BATCH_POLL_SECONDS)
+            batch = anthropic_client.messages.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            print(f"    {batch.id}: {counts.succeeded + counts.errored} of {len(requests)} done", flush=True)
+
+        entries = anthropic_client.messages.batches.results(batch.id)
+    except Exception as e:
+        print(f"    Warning: Batch image analysis failed: {e}")
+        return {}
+
+    # Entries are handled one by one so a malformed answer only loses that image
+    results = {}
+    try:
+        for entry in entries:
+            try:
+                if entry.result.type != "succeeded":
+                    print(f"    Warning: Image analysis {entry.custom_id} {entry.result.type}")
+                    continue
+                analysis = parse_analysis_response(entry.result.message.content[0].text)
+            except Exception as e:
+                print(f"    Warning: Could not read image analysis {getattr(entry, 'custom_id', '?')}: {e}")
+                continue
+            if isinstance(analysis, dict):
+                results[entry.custom_id] = analysis
+            else:
+                print(f"    Warning: Image analysis {entry.custom_id} was not a JSON object")
+    except Exception as e:
+        # Streaming the results failed part-way; keep what was read
+        print(f"    Warning: Could not read all batch results: {e}")
+    return results
+
+
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_DASH_RE = re.compile(r'[-\s]+')
 
 
 def slugify(text):
     """Convert text to a URL-friendly slug."""
-    text = text.lower().strip()
-    text = re.sub(r'[^\w\s-]', '', text)
-    text = re.sub(r'[-\s]+', '-', text)
-    return text[:50]
+    text = _SLUG_STRIP_RE.sub('', text.lower().strip())
+    return _SLUG_DASH_RE.sub('-', text)[:50]
+
+
+# Run properties read by extract_formatted_runs()
+_XSD_TRUE = frozenset({'1', 'true'})
+_A_HLINK_CLICK_TAG = qn('a:hlinkClick')
+_A_SOLID_SRGB_PATH = f"{qn('a:solidFill')}/{qn('a:srgbClr')}"
 
 
 def extract_formatted_runs(paragraph):
@@ -196,33 +507,35 @@ def extract_formatted_runs(paragraph):
 
     try:
         for run in paragraph.runs:
-            if not run.text:
+            text = run.text
+            if not text:
                 continue
 
-            # Get formatting
-            bold = run.font.bold if run.font.bold is not None else False
-            italic = run.font.italic if run.font.italic is not None else False
-            underline = run.font.underline is not None and run.font.underline
-
-            # Get URL if present
-            url = None
-            if hasattr(run, 'hyperlink') and run.hyperlink and run.hyperlink.address:
-                url = run.hyperlink.address
-
-            # Get font color
-            font_color = None
-            try:
-                if run.font.color and run.font.color.rgb:
-                    font_color = str(run.font.color.rgb)
-            except Exception:
-                pass
+            # Formatting is read straight from <a:rPr>: the run.font wrappers
+            # re-resolve it per property (and font.color rewrites the fill)
+            bold = italic = underline = False
+            url = font_color = None
+            rPr = run._r.rPr
+            if rPr is not None:
+                bold = rPr.get('b') in _XSD_TRUE
+                italic = rPr.get('i') in _XSD_TRUE
+                underline = rPr.get('u', 'none') != 'none'
+
+                # Get URL if present
+                if rPr.find(_A_HLINK_CLICK_TAG) is not None:
+                    url = run.hyperlink.address or None
+
+                # Get font color (theme colours have no RGB value)
+                srgb = rPr.find(_A_SOLID_SRGB_PATH)
+                if srgb is not None:
+                    font_color = srgb.get('val', '').upper() or None
 
             # Track if any run has formatting
             if bold or italic or underline or url or font_color:
                 has_any_formatting = True
 
             # Include ALL runs to preserve full text
-            run_dict = {'text': run.text}
+            run_dict = {'text': text}
             if bold:
                 run_dict['bold'] = True
             if italic:
@@ -240,6 +553,17 @@ def extract_formatted_runs(paragraph):
     return runs if has_any_formatting else []
 
 
+NS_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+NS_DGM = 'http://schemas.openxmlformats.org/drawingml/2006/diagram'
+NS_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+NS_P14 = 'http://schemas.microsoft.com/office/powerpoint/2010/main'
+
+_ANIMATION_NS = {'p': NS_P}
+# Shape ids targeted by the effects of an animation sequence, in document order
+_ANIMATION_TARGET_SPIDS = etree.XPath('.//p:par//p:tgtEl/p:spTgt/@spid', namespaces=_ANIMATION_NS)
+
+
 def extract_animation_map(slide):
     """Extract animation order for shapes on a slide.
 
@@ -247,134 +571,129 @@ def extract_animation_map(slide):
     """
     animation_map = {}
     try:
-        slide_elem = slide._element
-        ns = {
-            'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-            'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-        }
-
-        timing = slide_elem.find('.//p:timing', ns)
-        if timing is None:
-            return animation_map
-
-        seq = timing.find('.//p:seq', ns)
+        seq = slide._element.find('p:timing//p:seq', _ANIMATION_NS)
         if seq is None:
             return animation_map
 
-        order = 0
-        for child_tn_lst in seq.findall('.//p:childTnLst', ns):
-            for par in child_tn_lst.findall('p:par', ns):
-                for tgt_el in par.findall('.//p:tgtEl', ns):
-                    sp_tgt = tgt_el.find('p:spTgt', ns)
-                    if sp_tgt is not None:
-                        shape_id_str = sp_tgt.get('spid')
-                        if shape_id_str:
-                            order += 1
-                            shape_id = int(shape_id_str)
-                            if shape_id not in animation_map:
-                                animation_map[shape_id] = order
+        for order, shape_id_str in enumerate(_ANIMATION_TARGET_SPIDS(seq), 1):
+            animation_map.setdefault(int(shape_id_str), order)
     except Exception as e:
         print(f"    Warning: Could not extract animation map: {e}")
 
     return animation_map
 
 
-def extract_auto_shape(shape, animation_map):
+# Shape names that suggest a diagram element worth keeping, as one alternation
+# ('notequal' and 'not equal' are already covered by 'equal')
+_MEANINGFUL_SHAPE_NAME_RE = re.compile(
+    'arrow|connector|line|equal|plus|minus|chevron|block|star|heart|lightning|sun'
+    '|callout|bubble|cloud|oval|rectangle|triangle|pentagon|hexagon|cross'
+)
+
+
+# MSO_SHAPE_TYPE values as plain ints
+_AUTO_SHAPE_TYPE_NAMES = {
+    1: "auto_shape",
+    2: "callout",
+    5: "freeform",
+    9: "line",
+    19: "text_box",
+    21: "connector",
+}
+# Groups, OLE objects, pictures, placeholders, media, text boxes, script
+# anchors and tables are handled elsewhere
+_AUTO_SHAPE_SKIP_TYPES = frozenset({6, 7, 13, 14, 16, 17, 18, 19})
+# MSO_AUTO_SHAPE_TYPE member -> shape_type string, e.g. "right_arrow (33)".
+# Filled on first use from str(member), whose format differs across
+# python-pptx versions
+_AUTO_SHAPE_PRESET_NAMES = {}
+
+
+def _rgb_string(color_format):
+    """Hex RGB of a ColorFormat, or None for theme colours and unset colours."""
+    try:
+        rgb = color_format.rgb
+    except AttributeError:
+        return None
+    return str(rgb) if rgb else None
+
+
+def extract_auto_shape(shape, animation_map, paragraphs=None):
     """Extract auto shape (arrow, connector, symbol, etc.).
 
-    Returns ShapeBlock dict if this is a meaningful auto shape, None otherwise.
+    paragraphs is the shape's extract_text_from_shape() output, which
+    supplies the formatted runs. Returns ShapeBlock dict if this is a
+    meaningful auto shape, None otherwise.
     """
     try:
         shape_type_val = shape.shape_type
 
-        shape_type_names = {
-            1: "auto_shape",
-            2: "callout",
-            5: "freeform",
-            9: "line",
-            19: "text_box",
-            21: "connector",
-        }
-
         # Skip types we handle elsewhere
-        skip_types = {6, 7, 13, 14, 16, 17, 18, 19}
-        if shape_type_val in skip_types:
+        if shape_type_val in _AUTO_SHAPE_SKIP_TYPES:
             return None
 
-        shape_name = shape.name if hasattr(shape, 'name') else ""
-
-        meaningful_keywords = [
-            'arrow', 'connector', 'line', 'equal', 'plus', 'minus',
-            'chevron', 'block', 'star', 'heart', 'lightning', 'sun',
-            'callout', 'bubble', 'cloud', 'oval', 'rectangle', 'triangle',
-            'pentagon', 'hexagon', 'cross', 'notequal', 'not equal'
-        ]
+        shape_name = getattr(shape, 'name', None) or ""
 
-        name_lower = shape_name.lower()
-        is_meaningful = any(kw in name_lower for kw in meaningful_keywords)
+        is_meaningful = _MEANINGFUL_SHAPE_NAME_RE.search(shape_name.lower()) is not None
 
         auto_shape_type = None
-        if hasattr(shape, 'auto_shape_type') and shape.auto_shape_type:
-            auto_shape_type = str(shape.auto_shape_type).split('.')[-1].lower()
+        try:
+            preset = shape.auto_shape_type
+        except (AttributeError, ValueError):
+            preset = None  # Not a preset-geometry shape (freeform, picture, ...)
+        if preset:
+            auto_shape_type = _AUTO_SHAPE_PRESET_NAMES.get(preset)
+            if auto_shape_type is None:
+                auto_shape_type = str(preset).split('.')[-1].lower()
+                _AUTO_SHAPE_PRESET_NAMES[preset] = auto_shape_type
             is_meaningful = is_meaningful or auto_shape_type not in ('rectangle', 'rounded_rectangle')
 
+        fill = getattr(shape, 'fill', None)
         if not is_meaningful and shape_type_val == 1:
-            try:
-                if hasattr(shape, 'fill') and shape.fill:
-                    fill_type = shape.fill.type
-                    if fill_type is None:
-                        return None
-            except Exception:
+            if fill is None or fill.type is None:
                 return None
 
         if not is_meaningful:
             return None
 
         # Get position
-        left = shape.left if hasattr(shape, 'left') and shape.left else 0
-        top = shape.top if hasattr(shape, 'top') and shape.top else 0
-        width = shape.width if hasattr(shape, 'width') and shape.width else 0
-        height = shape.height if hasattr(shape, 'height') and shape.height else 0
+        left = getattr(shape, 'left', None) or 0
+        top = getattr(shape, 'top', None) or 0
+        width = getattr(shape, 'width', None) or 0
+        height = getattr(shape, 'height', None) or 0
 
         # Get text inside shape
         text = ""
         runs = []
-        if shape.has_text_frame and shape.text_frame.text.strip():
+        if shape.has_text_frame:
             text = shape.text_frame.text.strip()
-            for p in shape.text_frame.paragraphs:
-                runs.extend(extract_formatted_runs(p))
+            for para in paragraphs or ():
+                runs.extend(para.get('runs', ()))
 
-        # Get colors
+        # Get colors. Only solid and patterned fills have a foreground colour;
+        # checking the type first avoids the TypeError python-pptx raises for
+        # the rest, and (for lines) .color forcing the line fill to solid
         fill_color = None
         line_color = None
-        try:
-            if hasattr(shape, 'fill') and shape.fill and shape.fill.fore_color:
-                if shape.fill.fore_color.rgb:
-                    fill_color = str(shape.fill.fore_color.rgb)
-        except Exception:
-            pass
+        if fill is not None and fill.type in (MSO_FILL.SOLID, MSO_FILL.PATTERNED):
+            fill_color = _rgb_string(fill.fore_color)
 
-        try:
-            if hasattr(shape, 'line') and shape.line and shape.line.color:
-                if shape.line.color.rgb:
-                    line_color = str(shape.line.color.rgb)
-        except Exception:
-            pass
+        line = getattr(shape, 'line', None)
+        if line is not None and line.fill.type == MSO_FILL.SOLID:
+            line_color = _rgb_string(line.color)
 
         # Get rotation
-        rotation = 0.0
-        if hasattr(shape, 'rotation'):
-            rotation = shape.rotation or 0.0
+        rotation = getattr(shape, 'rotation', None) or 0.0
 
         # Get animation order
         animation_order = None
-        shape_id = shape.shape_id if hasattr(shape, 'shape_id') else None
+        shape_id = getattr(shape, 'shape_id', None)
         if shape_id and shape_id in animation_map:
             animation_order = animation_map[shape_id]
 
         result = {
             'type': 'shape',
-            'shape_type': auto_shape_type or shape_type_names.get(shape_type_val, "shape"),
+            'shape_type': auto_shape_type or _AUTO_SHAPE_TYPE_NAMES.get(shape_type_val, "shape"),
             'shape_name': shape_name,
             'position': {
                 'left': left,
@@ -403,6 +722,32 @@ def extract_auto_shape(shape, animation_map):
         return None
 
 
+# Clark-notation tags for the SmartArt and video walks (the dgm and p14
+# prefixes are not in python-pptx's qn() map)
+_A_T = f'{{{NS_A}}}t'
+_A_BLIP = f'{{{NS_A}}}blip'
+_A_CNVPR = f'{{{NS_A}}}cNvPr'
+_A_VIDEO_FILE = f'{{{NS_A}}}videoFile'
+_DGM_RELIDS = f'{{{NS_DGM}}}relIds'
+_DGM_PT = f'{{{NS_DGM}}}pt'
+_DGM_CXN = f'{{{NS_DGM}}}cxn'
+_DGM_PRSET = f'{{{NS_DGM}}}prSet'
+_DGM_TITLE = f'{{{NS_DGM}}}title'
+_R_DM = f'{{{NS_R}}}dm'
+_R_LO = f'{{{NS_R}}}lo'
+_R_EMBED = f'{{{NS_R}}}embed'
+_R_LINK = f'{{{NS_R}}}link'
+_P_NVPR = f'{{{NS_P}}}nvPr'
+_P14_MEDIA = f'{{{NS_P14}}}media'
+
+# Characters replaced in SmartArt icon filename prefixes
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^A-Za-z0-9_]')
+# Braces and dashes dropped from diagram model ids ({GUID}) in icon filenames
+_MODEL_ID_STRIP = str.maketrans('', '', '{}-')
+# Diagram XML parser: no id index (nothing looks ids up) and no entity expansion
+_DIAGRAM_XML_PARSER = etree.XMLParser(collect_ids=False, resolve_entities=False)
+
+
 def extract_smart_art(shape, slide, media_dir, slide_num=None):
     """Extract SmartArt diagram content from a graphicFrame shape.
 
@@ -412,62 +757,59 @@ def extract_smart_art(shape, slide, media_dir, slide_num=None):
 
     Returns a smart_art content block with nodes, or None if not SmartArt.
     """
-    from lxml import etree
     import os
 
-    el = shape._element
-    ns_dgm = "http://schemas.openxmlformats.org/drawingml/2006/diagram"
-    ns_a = "http://schemas.openxmlformats.org/drawingml/2006/main"
-    ns_r = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
-
-    dgm_els = el.findall('.//{%s}relIds' % ns_dgm)
-    if not dgm_els:
+    rel_ids = next(shape._element.iter(_DGM_RELIDS), None)
+    if rel_ids is None:
         return None
 
     try:
         # Get diagram data relationship
-        dm_rid = dgm_els[0].get('{%s}dm' % ns_r)
+        dm_rid = rel_ids.get(_R_DM)
         if not dm_rid or dm_rid not in slide.part.rels:
             return None
 
         shape_id = getattr(shape, 'shape_id', 'shape')
         prefix = f"slide{slide_num if slide_num is not None else 'x'}_sh{shape_id}_{dm_rid}"
-        prefix = re.sub(r'[^A-Za-z0-9_]', '_', prefix)
+        prefix = _UNSAFE_FILENAME_CHARS_RE.sub('_', prefix)
 
         rel = slide.part.rels[dm_rid]
         data_part = rel.target_part
-        xml = etree.fromstring(data_part.blob)
-
-        # Extract all diagram points (nodes) with icons
-        pts = xml.findall('.//{%s}pt' % ns_dgm)
-        cxns = xml.findall('.//{%s}cxn' % ns_dgm)
+        xml = etree.fromstring(data_part.blob, parser=_DIAGRAM_XML_PARSER)
+
+        # Collect diagram points (nodes) and connections in one walk
+        pts = []
+        cxns = []
+        for node_el in xml.iter(_DGM_PT, _DGM_CXN):
+            if node_el.tag == _DGM_PT:
+                pts.append(node_el)
+            else:
+                cxns.append(node_el)
 
         # Build node map with icon extraction
         node_map = {}
         for pt in pts:
             mid = pt.get('modelId')
             ptype = pt.get('type', 'node')
-            t_els = pt.findall('.//{%s}t' % ns_a)
-            text = ' '.join((t.text or '') for t in t_els).strip()
+            text = ' '.join((t.text or '') for t in pt.iter(_A_T)).strip()
 
             # Extract icon image from blip element
             icon = None
             icon_alt = None
-            cnvpr = pt.find('.//{%s}cNvPr' % ns_a)
+            cnvpr = next(pt.iter(_A_CNVPR), None)
             if cnvpr is not None:
                 icon_alt = cnvpr.get('descr') or cnvpr.get('title')
-            blip = pt.find('.//{%s}blip' % ns_a)
+            blip = next(pt.iter(_A_BLIP), None)
             if blip is not None:
-                rid = blip.get('{%s}embed' % ns_r)
+                rid = blip.get(_R_EMBED)
                 if rid:
                     try:
                         img_part = data_part.related_part(rid)
                         ext = img_part.content_type.split('/')[-1].replace('x-', '').replace('+xml', '')
-                        safe_mid = mid.replace('{', '').replace('}', '').replace('-', '')
+                        safe_mid = mid.translate(_MODEL_ID_STRIP)
                         fname = f"sa_{prefix}_{safe_mid}.{ext}"
                         fpath = os.path.join(str(media_dir), fname)
-                        with open(fpath, 'wb') as f:
-                            f.write(img_part.blob)
+                        write_media_file(fpath, img_part.blob)
                         icon = f"./{fname}"
                     except (KeyError, IOError) as e:
                         print(f"    Warning: Could not extract SmartArt icon: {e}")
@@ -504,32 +846,52 @@ def extract_smart_art(shape, slide, media_dir, slide_num=None):
         # presAssocID explicit associations
         for pt in pts:
             mid = pt.get('modelId')
-            pr_set = pt.find('{%s}prSet' % ns_dgm)
+            pr_set = pt.find(_DGM_PRSET)
             if pr_set is not None:
                 assoc_id = pr_set.get('presAssocID')
                 if assoc_id:
                     visual_to_data[mid] = assoc_id
 
-        # Reassign icons from visual nodes to their data owners
-        def find_data_owner(vid):
-            curr = vid
-            visited = set()
-            while curr and curr not in visited:
-                visited.add(curr)
-                if curr in visual_to_data:
-                    did = visual_to_data[curr]
-                    if did != data_root_id:
+        # Reassign icons from visual nodes to their data owners. A visual
+        # node's owner is its own data node, else a sibling's, else its
+        # parent's owner; owners are memoized so each node is resolved once
+        mapped_children = {
+            parent: [(sib, visual_to_data[sib]) for sib in children
+                     if sib in visual_to_data and visual_to_data[sib] != data_root_id]
+            for parent, children in visual_children.items()
+        }
+        owners = {}
+
+        def local_data_owner(vid):
+            did = visual_to_data.get(vid)
+            if did is not None and did != data_root_id:
+                return did
+            parent = visual_parent.get(vid)
+            if parent:
+                for sib, did in mapped_children.get(parent, ()):
+                    if sib != vid:
                         return did
-                parent = visual_parent.get(curr)
-                if parent:
-                    for sib in visual_children.get(parent, []):
-                        if sib != curr and sib in visual_to_data:
-                            did = visual_to_data[sib]
-                            if did != data_root_id:
-                                return did
-                curr = parent
             return None
 
+        def find_data_owner(vid):
+            # Climb until an owner is found (or already known); every node
+            # passed on the way had none of its own, so they share it
+            path = []
+            seen = set()
+            curr = vid
+            while curr and curr not in seen and curr not in owners:
+                seen.add(curr)
+                path.append(curr)
+                owner = local_data_owner(curr)
+                if owner is not None:
+                    break
+                curr = visual_parent.get(curr)
+            else:
+                owner = owners.get(curr)
+            for mid in path:
+                owners[mid] = owner
+            return owner
+
         for mid, node in node_map.items():
             if node['icon']:
                 owner_id = find_data_owner(mid)
@@ -543,33 +905,33 @@ def extract_smart_art(shape, slide, media_dir, slide_num=None):
         # Find doc node for tree building
         doc_node = data_root_id
 
-        def build_node(mid, level=0):
-            node = node_map.get(mid)
-            if not node or node['type'] != 'node':
-                return None
-            if not node['text'] and not node['icon']:
-                return None
-            result = {
-                'id': mid[:8],
-                'text': node['text'],
-                'level': level,
-                'children': [],
-                'icon': node['icon'],
-                'icon_alt': node['icon_alt']
-            }
-            for child_id in node.get('children_ids', []):
-                child = build_node(child_id, level + 1)
-                if child:
-                    result['children'].append(child)
-            return result
-
-        # Build tree from doc node's children
+        # Build tree from doc node's children, depth-first with an explicit
+        # stack of (id, level, list to append to). Children are pushed in
+        # reverse to keep document order; placed guards against parOf cycles
         nodes = []
         if doc_node and doc_node in node_map:
-            for child_id in node_map[doc_node]['children_ids']:
-                node = build_node(child_id, 0)
-                if node:
-                    nodes.append(node)
+            stack = [(child_id, 0, nodes)
+                     for child_id in reversed(node_map[doc_node]['children_ids'])]
+            placed = set()
+            while stack:
+                mid, level, siblings = stack.pop()
+                node = node_map.get(mid)
+                if (not node or node['type'] != 'node' or mid in placed
+                        or (not node['text'] and not node['icon'])):
+                    continue
+                placed.add(mid)
+                result = {
+                    'id': mid[:8],
+                    'text': node['text'],
+                    'level': level,
+                    'children': [],
+                    'icon': node['icon'],
+                    'icon_alt': node['icon_alt']
+                }
+                siblings.append(result)
+                children = result['children']
+                stack.extend((child_id, level + 1, children)
+                             for child_id in reversed(node['children_ids']))
 
         if not nodes:
             # Fallback: collect all nodes with text or icons
@@ -590,12 +952,12 @@ def extract_smart_art(shape, slide, media_dir, slide_num=None):
         # Try to detect layout type from diagram XML
         layout_name = ''
         try:
-            lo_rid = dgm_els[0].get('{%s}lo' % ns_r)
+            lo_rid = rel_ids.get(_R_LO)
             if lo_rid and lo_rid in slide.part.rels:
                 lo_rel = slide.part.rels[lo_rid]
-                lo_xml = etree.fromstring(lo_rel.target_part.blob)
+                lo_xml = etree.fromstring(lo_rel.target_part.blob, parser=_DIAGRAM_XML_PARSER)
                 # Layout name is in <dgm:title val="..."/> child element
-                title_el = lo_xml.find('{%s}title' % ns_dgm)
+                title_el = lo_xml.find(_DGM_TITLE)
                 if title_el is not None:
                     layout_name = title_el.get('val', '')
         except Exception:
@@ -616,6 +978,11 @@ def extract_smart_art(shape, slide, media_dir, slide_num=None):
         return None
 
 
+# Paragraph children that carry text (<a:br> only adds a line break)
+_A_RUN_TAG = qn('a:r')
+_A_FIELD_TAG = qn('a:fld')
+
+
 def extract_text_from_shape(shape):
     """Extract text content from a shape with formatting."""
     if not shape.has_text_frame:
@@ -623,14 +990,23 @@ def extract_text_from_shape(shape):
 
     paragraphs = []
     for para in shape.text_frame.paragraphs:
-        text = para.text.strip()
+        # Read text and level straight from the <a:p> element: para.level and
+        # para.font add empty <a:pPr>/<a:defRPr> children on every access
+        p = para._p
+        # Empty placeholder paragraphs have no runs at all; skip them before
+        # joining any text
+        if p.find(_A_RUN_TAG) is None and p.find(_A_FIELD_TAG) is None:
+            continue
+        text = p.text.strip()
         if text:
+            pPr = p.pPr
+            defRPr = pPr.defRPr if pPr is not None else None
             # Detect list items by bullet or level
-            level = para.level if para.level else 0
+            level = pPr.lvl if pPr is not None else 0
             item = {
                 'text': text,
                 'level': level,
-                'is_bullet': level > 0 or (para.font and para.font.bold is False)
+                'is_bullet': level > 0 or (defRPr is not None and defRPr.b is False)
             }
             # Extract formatted runs
             runs = extract_formatted_runs(para)
@@ -641,6 +1017,25 @@ def extract_text_from_shape(shape):
     return paragraphs if paragraphs else None
 
 
+def build_list_block(paragraphs):
+    """Build a bullet list content block from extract_text_from_shape() output."""
+    items = []
+    for para in paragraphs:
+        item = {'text': para['text']}
+        if 'runs' in para:
+            item['runs'] = para['runs']
+        items.append(item)
+    return {
+        'type': 'list',
+        'style': 'bullet',
+        'items': items
+    }
+
+
+# EMF record header: record type, record size (both little-endian uint32)
+_EMF_RECORD_HEADER = struct.Struct('<II')
+
+
 def extract_emf_embedded_image(emf_data: bytes):
     """
     Extract embedded JPEG/PNG image from EMF+ (Enhanced Metafile Plus) format.
@@ -651,44 +1046,40 @@ def extract_emf_embedded_image(emf_data: bytes):
     Returns:
         Tuple of (image_bytes, extension) if found, None otherwise
     """
-    import struct
-
     # EMF+ uses comment records (type 70) to store GDI+ data
-    # Look for GDIC records which often contain embedded images
+    # Look for GDIC records which often contain embedded images.
+    # Records are searched in place with start/end bounds; only the image
+    # that is returned gets copied out of emf_data
+    if b'GDIC' not in emf_data:
+        return None  # plain vector EMF: no record can hold an image
+
+    data_len = len(emf_data)
     pos = 0
-    while pos < len(emf_data) - 8:
+    while pos < data_len - 8:
         try:
-            record_type, record_size = struct.unpack('<II', emf_data[pos:pos+8])
+            record_type, record_size = _EMF_RECORD_HEADER.unpack_from(emf_data, pos)
         except struct.error:
             break
 
         if record_type == 70:  # EMR_COMMENT (may contain EMF+ or GDIC data)
-            comment_data = emf_data[pos+8:pos+record_size]
-            if len(comment_data) > 8:
-                # Check for GDIC identifier (contains embedded images)
-                identifier = comment_data[4:8]
-                if identifier == b'GDIC':
-                    # Search for JPEG signature (FFD8FF)
-                    jpg_sig = b'\xff\xd8\xff'
-                    jpg_pos = comment_data.find(jpg_sig)
-                    if jpg_pos >= 0:
-                        # Extract JPEG - find EOI marker (0xFFD9)
-                        jpg_data = comment_data[jpg_pos:]
-                        eoi_pos = jpg_data.find(b'\xff\xd9')
-                        if eoi_pos > 0:
-                            jpg_data = jpg_data[:eoi_pos+2]
-                            return (jpg_data, 'jpg')
-
-                    # Search for PNG signature
-                    png_sig = b'\x89PNG\r\n\x1a\n'
-                    png_pos = comment_data.find(png_sig)
-                    if png_pos >= 0:
-                        # Extract PNG - find IEND chunk
-                        png_data = comment_data[png_pos:]
-                        iend_pos = png_data.find(b'IEND')
-                        if iend_pos > 0:
-                            png_data = png_data[:iend_pos+8]  # Include IEND + CRC
-                            return (png_data, 'png')
+            start = pos + 8
+            end = min(pos + record_size, data_len)
+            # Check for GDIC identifier (contains embedded images)
+            if end - start > 8 and emf_data.startswith(b'GDIC', start + 4):
+                # Search for JPEG signature (FFD8FF), then its EOI marker (FFD9)
+                jpg_pos = emf_data.find(b'\xff\xd8\xff', start, end)
+                if jpg_pos >= 0:
+                    eoi_pos = emf_data.find(b'\xff\xd9', jpg_pos + 1, end)
+                    if eoi_pos >= 0:
+                        return (emf_data[jpg_pos:eoi_pos + 2], 'jpg')
+
+                # Search for PNG signature, then the IEND chunk
+                png_pos = emf_data.find(b'\x89PNG\r\n\x1a\n', start, end)
+                if png_pos >= 0:
+                    iend_pos = emf_data.find(b'IEND', png_pos + 1, end)
+                    if iend_pos >= 0:
+                        # Include IEND + CRC
+                        return (emf_data[png_pos:min(iend_pos + 8, end)], 'png')
 
         if record_type == 14 or record_size == 0:  # EOF or invalid
             break
@@ -697,7 +1088,7 @@ def extract_emf_embedded_image(emf_data: bytes):
     return None
 
 
-def extract_image(shape, media_dir, slide_num, shape_idx, slide_title=None):
+def extract_image(shape, media_dir, slide_num, shape_idx):
     """Extract image from shape and save to media directory."""
     try:
         try:
@@ -713,67 +1104,42 @@ def extract_image(shape, media_dir, slide_num, shape_idx, slide_title=None):
             # Handle EMF/WMF vector formats - try to extract embedded images or convert
             if ext in ('emf', 'wmf') or content_type in ('image/x-emf', 'image/x-wmf'):
                 converted = False
-                # First try to extract embedded images from EMF+ format
-                try:
-                    embedded = extract_emf_embedded_image(blob)
-                    if embedded:
-                        blob, ext = embedded
-                        converted = True
-                        print(f"    Extracted embedded image from EMF+ format")
-                except Exception as emf_err:
-                    pass  # Silent fail, try Pillow next
-
-                # Fallback to Pillow conversion
+                # First try to extract embedded images from EMF+ format (only
+                # EMF files carry the ' EMF' signature at offset 40; a WMF has
+                # no such records to scan)
+                if blob.startswith(b' EMF', 40):
+                    try:
+                        embedded = extract_emf_embedded_image(blob)
+                        if embedded:
+                            blob, ext = embedded
+                            converted = True
+                            print(f"    Extracted embedded image from EMF+ format")
+                    except Exception as emf_err:
+                        pass  # Silent fail, try Pillow next
+
+                # Fallback to Pillow conversion. Vector renders are flat
+                # colour, so fast zlib level 1 costs little in file size
                 if not converted:
                     try:
                         from PIL import Image
-                        import io
-                        img = Image.open(io.BytesIO(blob))
                         png_buffer = io.BytesIO()
-                        img.save(png_buffer, format='PNG')
+                        with Image.open(io.BytesIO(blob)) as img:
+                            img.save(png_buffer, format='PNG', compress_level=1)
                         blob = png_buffer.getvalue()
                         ext = 'png'
                         print(f"    Converted {content_type or 'EMF/WMF'} to PNG")
                     except Exception as conv_err:
                         print(f"    Warning: Could not convert {ext} to PNG: {conv_err}")
 
-            filename = f"slide_{slide_num}_{shape_idx}.{ext}"
-            filepath = media_dir / filename
-
-            with open(filepath, 'wb') as f:
-                f.write(blob)
-
-            # Analyze image with Claude if enabled
-            description = None
-            quote_text = None
-            quote_attribution = None
-
-            if ANALYZE_IMAGES:
-                print(f"    Analyzing image: {filename}...")
-                analysis = analyze_image(image.blob, ext, slide_title)
-                if analysis:
-                    description = analysis.get('description')
-                    if analysis.get('has_quote') and analysis.get('quote_text'):
-                        quote_text = analysis.get('quote_text')
-                        quote_attribution = analysis.get('quote_attribution')
-                        print(f"    -> Quote: \"{quote_text[:60]}...\" - {quote_attribution}")
-                    elif description:
-                        print(f"    -> {description[:80]}...")
-
-            result = {
+            filename = save_media_blob(media_dir, f"slide_{slide_num}_{shape_idx}.{ext}", blob)
+
+            # description (and quote fields) are added by
+            # analyze_extracted_images() when --analyze-images is set
+            return {
                 'type': 'image',
                 'src': f"./{filename}",
-                'alt': shape.name or f"Slide {slide_num} image",
-                'caption': None,
-                'description': description
+                'alt': shape.name or f"Slide {slide_num} image"
             }
-
-            # Add quote fields if present
-            if quote_text:
-                result['quote_text'] = quote_text
-                result['quote_attribution'] = quote_attribution
-
-            return result
     except Exception as e:
         print(f"  Warning: Could not extract image: {e}")
 
@@ -784,8 +1150,17 @@ def extract_layout_background(slide_layout, media_dir, slide_num):
     """Extract the largest image from a slide layout (background image).
 
     Title/final slides often have a background image in the slide layout
-    rather than on the slide itself. This extracts that image.
+    rather than on the slide itself. This extracts that image. Slides
+    sharing a layout reuse the first result instead of rescanning it.
     """
+    key = (media_dir, slide_layout.part.partname)
+    if key not in _layout_backgrounds:
+        _layout_backgrounds[key] = _find_layout_background(slide_layout, media_dir, slide_num)
+    return _layout_backgrounds[key]
+
+
+def _find_layout_background(slide_layout, media_dir, slide_num):
+    """Save the largest layout image over 100KB; returns its ./path or None."""
     try:
         largest = None
         largest_size = 0
@@ -804,10 +1179,7 @@ def extract_layout_background(slide_layout, media_dir, slide_num):
         if largest and largest_size > 100000:  # >100KB, likely a background
             image = largest.image
             ext = image.ext
-            filename = f"layout_bg_{slide_num}.{ext}"
-            filepath = os.path.join(media_dir, filename)
-            with open(filepath, 'wb') as f:
-                f.write(image.blob)
+            filename = save_media_blob(media_dir, f"layout_bg_{slide_num}.{ext}", image.blob)
             print(f"  Extracted layout background: {filename} ({largest_size} bytes)")
             return f"./{filename}"
     except Exception as e:
@@ -828,30 +1200,23 @@ def extract_video(shape, media_dir, slide_num):
         if element is None:
             return None
 
-        ns = {
-            'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-            'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
-            'p14': 'http://schemas.microsoft.com/office/powerpoint/2010/main',
-            'p': 'http://schemas.openxmlformats.org/presentationml/2006/main',
-        }
-
         # Look for videoFile in nvPicPr/nvPr (picture shapes)
         videoFile = None
         nvPr = None
         if hasattr(element, 'nvPicPr') and element.nvPicPr is not None:
             nvPr = element.nvPicPr.nvPr
-            videoFile = nvPr.find('.//a:videoFile', ns)
+            videoFile = next(nvPr.iter(_A_VIDEO_FILE), None)
 
         # Also check nvSpPr for other shape types
         if videoFile is None and hasattr(element, 'nvSpPr') and element.nvSpPr is not None:
             nvPr = element.nvSpPr.nvPr
-            videoFile = nvPr.find('.//a:videoFile', ns)
+            videoFile = next(nvPr.iter(_A_VIDEO_FILE), None)
 
         # Fallback: whole element tree
         if videoFile is None:
-            videoFile = element.find('.//a:videoFile', ns)
+            videoFile = next(element.iter(_A_VIDEO_FILE), None)
             if videoFile is not None:
-                nvPr = element.find('.//p:nvPr', ns)
+                nvPr = next(element.iter(_P_NVPR), None)
 
         if videoFile is None:
             return None
@@ -859,7 +1224,7 @@ def extract_video(shape, media_dir, slide_num):
         video_title = shape.name if hasattr(shape, 'name') else "Video"
 
         # External video URL (YouTube etc.)
-        video_link_rId = videoFile.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}link')
+        video_link_rId = videoFile.get(_R_LINK)
         if video_link_rId:
             try:
                 target = shape.part.target_ref(video_link_rId)
@@ -876,9 +1241,9 @@ def extract_video(shape, media_dir, slide_num):
 
         # Embedded video (p14:media)
         if nvPr is not None:
-            p14_media = nvPr.find('.//p14:media', ns)
+            p14_media = next(nvPr.iter(_P14_MEDIA), None)
             if p14_media is not None:
-                embed_rId = p14_media.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
+                embed_rId = p14_media.get(_R_EMBED)
                 if embed_rId:
                     try:
                         video_part = shape.part.related_part(embed_rId)
@@ -894,8 +1259,7 @@ def extract_video(shape, media_dir, slide_num):
                             ext = ext_map.get(content_type, '.mp4')
                             video_filename = f"slide_{slide_num}_{shape.shape_id}{ext}"
                             video_path = media_dir / video_filename
-                            with open(video_path, 'wb') as f:
-                                f.write(video_part.blob)
+                            write_media_file(video_path, video_part.blob)
                             print(f"  Extracted embedded video: {video_filename}")
                             return {
                                 'type': 'video',
@@ -920,6 +1284,19 @@ def is_diagram_graphic_shape(shape):
         return False
 
 
+# Element tags that decide which extractors can apply to a shape: only p:pic
+# shapes have an image, only graphic frames hold tables and SmartArt
+_PIC_TAG = qn('p:pic')
+_GRAPHIC_FRAME_TAG = qn('p:graphicFrame')
+# Title and Center Title placeholders
+_TITLE_PLACEHOLDER_TYPES = frozenset({1, 3})
+
+
+def _shape_position(shape):
+    """Sort key ordering shapes top-to-bottom, then left-to-right."""
+    return (getattr(shape, 'top', None) or 0, getattr(shape, 'left', None) or 0)
+
+
 def process_slide(slide, slide_num, media_dir):
     """Process a single slide and extract its content."""
     content = []
@@ -934,26 +1311,26 @@ def process_slide(slide, slide_num, media_dir):
 
     # Extract animation map for this slide
     animation_map = extract_animation_map(slide)
+    # One walk of the slide tells whether any shape holds a video, instead of
+    # extract_video() searching every shape's subtree
+    has_video = next(slide._element.iter(_A_VIDEO_FILE), None) is not None
 
     # Sort shapes by position (top, left) for consistent ordering
-    shapes = list(slide.shapes)
-    shapes.sort(key=lambda s: (
-        s.top if (hasattr(s, 'top') and s.top is not None) else 0,
-        s.left if (hasattr(s, 'left') and s.left is not None) else 0
-    ))
+    shapes = sorted(slide.shapes, key=_shape_position)
 
     # Process shapes
     for idx, shape in enumerate(shapes):
         # Check for video in ANY shape type first (before other checks)
-        video_content = extract_video(shape, media_dir, slide_num)
-        if video_content:
-            content.append(video_content)
-            # Don't skip - shape may also have poster image or text
+        if has_video:
+            video_content = extract_video(shape, media_dir, slide_num)
+            if video_content:
+                content.append(video_content)
+                # Don't skip - shape may also have poster image or text
 
         # Title
         if shape.is_placeholder:
             placeholder_type = shape.placeholder_format.type
-            if placeholder_type in [1, 3]:  # Title or Center Title
+            if placeholder_type in _TITLE_PLACEHOLDER_TYPES:
                 if shape.has_text_frame:
                     title = shape.text_frame.text.strip()
                     # Clean up special characters
@@ -961,19 +1338,22 @@ def process_slide(slide, slide_num, media_dir):
                 continue  # Only skip title placeholders (1, 3)
             # Non-title placeholders (body, media, subtitle, etc.) fall through to content extraction
 
-        # Images - use hasattr check to catch placeholder images (type 14) too
-        try:
-            image = shape.image
-        except (AttributeError, ValueError):
-            image = None
-        if image is not None and hasattr(image, 'blob'):
-            img_content = extract_image(shape, media_dir, slide_num, idx, title)
-            if img_content:
-                content.append(img_content)
-            continue
+        tag = shape._element.tag
+
+        # Images - checked by element so placeholder images (type 14) are caught too
+        if tag == _PIC_TAG:
+            try:
+                image = shape.image
+            except (AttributeError, ValueError):
+                image = None
+            if image is not None and hasattr(image, 'blob'):
+                img_content = extract_image(shape, media_dir, slide_num, idx)
+                if img_content:
+                    content.append(img_content)
+                continue
 
         # Tables (simplified extraction)
-        if shape.has_table:
+        if tag == _GRAPHIC_FRAME_TAG and shape.has_table:
             table_text = []
             for row in shape.table.rows:
                 row_text = [cell.text.strip() for cell in row.cells]
@@ -987,36 +1367,25 @@ def process_slide(slide, slide_num, media_dir):
             continue
 
         # SmartArt diagrams (diagram graphic data)
-        if is_diagram_graphic_shape(shape):
+        if tag == _GRAPHIC_FRAME_TAG and is_diagram_graphic_shape(shape):
             smart_art_block = extract_smart_art(shape, slide, media_dir, slide_num)
             if smart_art_block:
                 content.append(smart_art_block)
                 continue
 
+        # Walked once; both the auto shape and the text content use it
+        text_content = extract_text_from_shape(shape)
+
         # Auto shapes (arrows, connectors, symbols)
-        shape_block = extract_auto_shape(shape, animation_map)
+        shape_block = extract_auto_shape(shape, animation_map, text_content)
         if shape_block:
             content.append(shape_block)
             # If shape has text, also process as text (don't skip)
-            if shape.has_text_frame and shape.text_frame.text.strip():
-                text_content = extract_text_from_shape(shape)
-                if text_content:
-                    items = []
-                    for p in text_content:
-                        item = {'text': p['text'], 'children': []}
-                        if 'runs' in p:
-                            item['runs'] = p['runs']
-                        items.append(item)
-                    if items:
-                        content.append({
-                            'type': 'list',
-                            'style': 'bullet',
-                            'items': items
-                        })
+            if text_content:
+                content.append(build_list_block(text_content))
             continue
 
         # Text content
-        text_content = extract_text_from_shape(shape)
         if text_content:
             # Check if it's a list or heading
             if len(text_content) == 1 and text_content[0]['level'] == 0:
@@ -1031,18 +1400,7 @@ def process_slide(slide, slide_num, media_dir):
                 content.append(heading)
             else:
                 # Multiple items - treat as list
-                items = []
-                for p in text_content:
-                    item = {'text': p['text'], 'children': []}
-                    if 'runs' in p:
-                        item['runs'] = p['runs']
-                    items.append(item)
-                if items:
-                    content.append({
-                        'type': 'list',
-                        'style': 'bullet',
-                        'items': items
-                    })
+                content.append(build_list_block(text_content))
 
     # Use actual PowerPoint layout name
     layout = slide.slide_layout.name
@@ -1066,6 +1424,271 @@ def process_slide(slide, slide_num, media_dir):
     return result
 
 
+def _init_slide_worker(input_path):
+    """Open the presentation once per worker process."""
+    global _worker_prs
+    # Workers may exit without flushing block-buffered output
+    sys.stdout.reconfigure(line_buffering=True)
+    _worker_prs = Presentation(str(input_path))
+
+
+def _process_slide_in_worker(slide_num, media_dir):
+    print(f"Processing slide {slide_num}...")
+    slide_data = process_slide(_worker_prs.slides[slide_num - 1], slide_num, media_dir)
+    # The parent dedupes and counts media files once all slides are back
+    return slide_data, flush_media_writes()
+
+
+def process_slides(prs, input_path, media_dir, workers=None):
+    """Process every slide, in parallel worker processes for larger decks.
+
+    Returns slide data in slide order. workers=None picks a count from the
+    CPU count and deck size; workers=1 processes slides in this process.
+    """
+    slide_count = len(prs.slides)
+    if workers is None:
+        workers = min(os.cpu_count() or 1, slide_count // MIN_SLIDES_PER_WORKER)
+    workers = max(1, min(workers, slide_count))
+
+    if workers == 1:
+        slides_data = []
+        for idx, slide in enumerate(prs.slides, 1):
+            print(f"Processing slide {idx}...")
+            slide_data = process_slide(slide, idx, media_dir)
+            slides_data.append(slide_data)
+            if slide_data['title']:
+                print(f"  Title: {slide_data['title'][:50]}...")
+        return slides_data
+
+    # Flush first so forked workers don't inherit (and repeat) buffered output
+    print(f"Processing {slide_count} slides in {workers} worker processes...", flush=True)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_slide_worker,
+                             initargs=(str(input_path),)) as pool:
+        # map() yields results in slide order regardless of completion order.
+        # Contiguous runs of slides per task keep IPC overhead down on big
+        # decks while leaving a few chunks per worker to balance uneven slides
+        chunksize = max(1, slide_count // (workers * 4))
+        slides_data = []
+        for slide_data, written in pool.map(_process_slide_in_worker, range(1, slide_count + 1),
+                                            repeat(media_dir), chunksize=chunksize):
+            slides_data.append(slide_data)
+            _written_media.update(written)
+        return slides_data
+
+
+def dedupe_media_files(slides_data, media_dir):
+    """Point repeated images at one file and delete the identical copies.
+
+    Logos and template images are often embedded on many slides; keeping one
+    file per distinct image shrinks the media folder and the number of images
+    analyzed later. Returns the number of files removed.
+    """
+    first_src_by_hash = {}
+    resolved = {}  # src -> src of the first identical file (a src may appear on several blocks)
+    removed = 0
+
+    def dedupe(src):
+        nonlocal removed
+        if src in resolved:
+            return resolved[src]
+        path = media_dir / src[2:]
+        try:
+            digest = hashlib.sha1(path.read_bytes()).digest()
+        except OSError:
+            return src
+        first_src = first_src_by_hash.setdefault(digest, src)
+        if first_src != src:
+            path.unlink()
+            _written_media.discard(path)
+            removed += 1
+        resolved[src] = first_src
+        return first_src
+
+    for slide_data in slides_data:
+        for block in slide_data['content']:
+            if block.get('type') == 'image' and block.get('src', '').startswith('./'):
+                block['src'] = dedupe(block['src'])
+        if slide_data.get('layout_background'):
+            slide_data['layout_background'] = dedupe(slide_data['layout_background'])
+
+    return removed
+
+
+def load_analysis_cache(cache_path):
+    """Load cached Claude analyses keyed by image SHA-256, or {} if unavailable.
+
+    The cache is a JSON Lines file with one {"sha256": ..., **analysis} record
+    per analyzed image. A line cut short by an interrupted run is skipped.
+    """
+    cache = {}
+    try:
+        with open(cache_path, 'rb') as f:
+            for line in f:
+                try:
+                    record = orjson.loads(line) if orjson else json.loads(line)
+                    cache[record.pop('sha256')] = record
+                except (ValueError, KeyError, AttributeError):
+                    continue
+    except OSError:
+        pass
+    return cache
+
+
+def append_analysis_cache(cache_file, digest, analysis):
+    """Append one analysis to the open cache file, flushed so it survives a crash.
+
+    Fallbacks for unparseable answers are skipped so they are retried.
+    """
+    if isinstance(analysis, UnparsedResponse):
+        return
+    record = {'sha256': digest, **analysis}
+    if orjson:
+        cache_file.write(orjson.dumps(record) + b'\n')
+    else:
+        cache_file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+    cache_file.flush()
+
+
+def image_dimensions(blob):
+    """Return (width, height) of an image blob, or None if it can't be read.
+
+    Pillow only parses the header here; pixel data is never decoded.
+    """
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(blob)) as img:
+            return img.size
+    except (ImportError, OSError):
+        return None
+
+
+def analyze_extracted_images(slides_data, media_dir, cache_path, use_batch=False, min_image_size=0,
+                             images_per_request=ANALYSIS_IMAGES_PER_REQUEST):
+    """Add Claude descriptions (and quotes) to extracted image blocks.
+
+    Each distinct file is analyzed once, with up to ANALYSIS_THREADS requests
+    in flight (or as one Message Batch when use_batch is set), and the result
+    is copied to every block that shows it. Results are cached in cache_path
+    by image content hash, so re-extracting a deck (or another deck with the
+    same images) skips those requests. Without use_batch, up to
+    images_per_request images share one request. Images whose shorter side is
+    below min_image_size pixels (icons, bullet glyphs) are not sent at all.
+    """
+    blocks_by_src = {}
+    titles = {}  # the first slide showing an image gives the model its context
+    for slide_data in slides_data:
+        for block in slide_data['content']:
+            src = block.get('src', '')
+            if block.get('type') != 'image' or not src.startswith('./'):
+                continue
+            if src not in blocks_by_src:
+                blocks_by_src[src] = []
+                titles[src] = slide_data['title']
+            blocks_by_src[src].append(block)
+    if not blocks_by_src:
+        return
+
+    def apply(src, analysis):
+        description = analysis.get('description')
+        quote_text = analysis.get('quote_text') if analysis.get('has_quote') else None
+        attribution = analysis.get('quote_attribution')
+        fields = {'description': description}
+        if quote_text:
+            fields['quote_text'] = quote_text
+            fields['quote_attribution'] = attribution
+        for block in blocks_by_src[src]:
+            block.update(fields)
+
+        if quote_text:
+            print(f"  {src[2:]} -> Quote: \"{quote_text[:60]}...\" - {attribution}")
+        elif description:
+            print(f"  {src[2:]} -> {description[:80]}...")
+
+    def read_blob(src):
+        path = media_dir / src[2:]
+        try:
+            return path.read_bytes()
+        except OSError as e:
+            print(f"    Warning: Could not read {path.name} for analysis: {e}")
+            return None
+
+    # Reuse cached analyses; everything else needs a request
+    cache = load_analysis_cache(cache_path)
+    cache_hits = 0
+    too_small = 0
+    pending = {}  # src -> content hash
+    for src in blocks_by_src:
+        blob = read_blob(src)
+        if blob is None:
+            continue
+        if min_image_size:
+            size = image_dimensions(blob)
+            if size and min(size) < min_image_size:
+                too_small += 1
+                continue
+        digest = hashlib.sha256(blob).hexdigest()
+        if digest in cache:
+            apply(src, cache[digest])
+            cache_hits += 1
+        else:
+            pending[src] = digest
+    if cache_hits:
+        print(f"  {cache_hits} images reused cached analyses")
+    if too_small:
+        print(f"  Skipped {too_small} images smaller than {min_image_size}px")
+
+    if not pending:
+        return
+
+    # Each result is appended as soon as it arrives, so an interrupted run
+    # keeps everything analyzed so far
+    with open(cache_path, 'a+b') as cache_file:
+        # Start on a fresh line if an interrupted run left a partial record
+        if cache_file.tell():
+            cache_file.seek(-1, os.SEEK_END)
+            if cache_file.read(1) != b'\n':
+                cache_file.write(b'\n')
+
+        if use_batch and len(pending) > 1:
+            print(f"Analyzing {len(pending)} images with the Message Batches API...")
+            requests = {}
+            ids_to_src = {}
+            for index, src in enumerate(pending):
+                blob = read_blob(src)
+                params = build_analysis_request(blob, src.rsplit('.', 1)[-1], titles[src]) if blob else None
+                if params:
+                    requests[f"img-{index}"] = params
+                    ids_to_src[f"img-{index}"] = src
+            for custom_id, analysis in analyze_images_in_batch(requests).items():
+                src = ids_to_src[custom_id]
+                append_analysis_cache(cache_file, pending[src], analysis)
+                apply(src, analysis)
+        else:
+            def analyze(group):
+                images = []
+                group_srcs = []
+                for src in group:
+                    blob = read_blob(src)
+                    if blob:
+                        images.append((blob, src.rsplit('.', 1)[-1], titles[src]))
+                        group_srcs.append(src)
+                return zip(group_srcs, analyze_image_group(images)) if images else ()
+
+            # Images stay in slide order, so a slide's images usually share a request
+            supported = [src for src in pending if src.rsplit('.', 1)[-1].lower() in IMAGE_MEDIA_TYPES]
+            groups = [supported[i:i + images_per_request]
+                      for i in range(0, len(supported), images_per_request)]
+            print(f"Analyzing {len(supported)} images ({images_per_request} per request, "
+                  f"{ANALYSIS_THREADS} requests in parallel)...")
+            with ThreadPoolExecutor(max_workers=ANALYSIS_THREADS) as pool:
+                futures = [pool.submit(analyze, group) for group in groups]
+                for future in as_completed(futures):
+                    for src, analysis in future.result():
+                        if analysis:
+                            append_analysis_cache(cache_file, pending[src], analysis)
+                            apply(src, analysis)
+
+
 def extract_native_sections(prs):
     """Extract sections from the PPTX file's native section structure.
 
@@ -1112,6 +1735,19 @@ def extract_native_sections(prs):
     return None
 
 
+# Layouts that mark a section break when the slide has a title and nothing else
+SECTION_TITLE_LAYOUT_KEYWORDS = ('title only', 'title slide', 'full blue background')
+
+
+def is_section_header(slide_data):
+    """Whether a slide starts a new section in layout-based detection."""
+    layout = slide_data['layout'].lower()
+    if 'section heading' in layout:
+        return True
+    return (not slide_data['content'] and bool(slide_data['title']) and
+            any(kw in layout for kw in SECTION_TITLE_LAYOUT_KEYWORDS))
+
+
 def detect_sections(prs, slides_data):
     """Extract sections from PPTX file. Uses native PowerPoint sections if available,
     falls back to layout-based heuristic detection."""
@@ -1142,13 +1778,7 @@ def detect_sections(prs, slides_data):
     }
 
     for slide_data in slides_data:
-        is_section_header = (
-            'section heading' in slide_data['layout'].lower() or
-            (len(slide_data['content']) == 0 and slide_data['title'] and
-             any(kw in slide_data['layout'].lower() for kw in ['title only', 'title slide', 'full blue background']))
-        )
-
-        if is_section_header and current_section['slides']:
+        if is_section_header(slide_data) and current_section['slides']:
             sections.append(current_section)
             current_section = {
                 'title': slide_data['title'],
@@ -1163,7 +1793,8 @@ def detect_sections(prs, slides_data):
     return sections
 
 
-def extract_pptx(input_path, output_dir):
+def extract_pptx(input_path, output_dir, workers=None, batch_analysis=False, min_image_size=0,
+                 images_per_request=ANALYSIS_IMAGES_PER_REQUEST):
     """Main extraction function."""
     input_path = Path(input_path)
     output_dir = Path(output_dir)
@@ -1183,16 +1814,20 @@ def extract_pptx(input_path, output_dir):
     print()
 
     # Load presentation
-    prs = Presentation(input_path)
+    prs = Presentation(str(input_path))
 
     # Process slides
-    slides_data = []
-    for idx, slide in enumerate(prs.slides, 1):
-        print(f"Processing slide {idx}...")
-        slide_data = process_slide(slide, idx, media_dir)
-        slides_data.append(slide_data)
-        if slide_data['title']:
-            print(f"  Title: {slide_data['title'][:50]}...")
+    slides_data = process_slides(prs, input_path, media_dir, workers)
+    flush_media_writes()
+
+    duplicates_removed = dedupe_media_files(slides_data, media_dir)
+    if duplicates_removed:
+        print(f"Removed {duplicates_removed} duplicate media files (same image on several slides)")
+
+    if ANALYZE_IMAGES:
+        analyze_extracted_images(slides_data, media_dir, output_dir / '.image_analysis_cache.jsonl',
+                                 use_batch=batch_analysis, min_image_size=min_image_size,
+                                 images_per_request=images_per_request)
 
     print()
 
@@ -1201,7 +1836,7 @@ def extract_pptx(input_path, output_dir):
     print(f"Detected {len(sections)} sections")
 
     # Count media files
-    media_files = list(media_dir.glob('*'))
+    media_files = [f for f in _written_media if f.parent == media_dir]
     image_count = len([f for f in media_files if f.suffix.lower() in ['.png', '.jpg', '.jpeg', '.gif']])
     video_count = len([f for f in media_files if f.suffix.lower() in ['.mp4', '.m4v', '.webm', '.mov', '.avi']])
 
@@ -1222,8 +1857,11 @@ def extract_pptx(input_path, output_dir):
 
     # Write JSON
     json_path = output_dir / 'presentation.json'
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    if orjson:
+        json_path.write_bytes(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+    else:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2, ensure_ascii=False)
 
     print()
     print("=" * 50)
@@ -1246,7 +1884,7 @@ def extract_pptx(input_path, output_dir):
 
 
 def main():
-    global ANALYZE_IMAGES
+    global ANALYZE_IMAGES, ANALYSIS_THREADS
 
     parser = argparse.ArgumentParser(
         description=__doc__,
@@ -1258,14 +1896,30 @@ def main():
     parser.add_argument('--analyze-images', action='store_true',
                         help='Analyze images with Claude AI to generate descriptions. '
                              'Requires ANTHROPIC_API_KEY environment variable.')
+    parser.add_argument('--batch-analysis', action='store_true',
+                        help='With --analyze-images, submit images through the Message Batches '
+                             'API: half the price, but results can take minutes to hours')
+    parser.add_argument('--max-concurrency', type=int, default=ANALYSIS_THREADS, metavar='N',
+                        help='With --analyze-images, number of Claude requests in flight at once '
+                             f'(default: {ANALYSIS_THREADS})')
+    parser.add_argument('--images-per-request', type=int, default=ANALYSIS_IMAGES_PER_REQUEST, metavar='N',
+                        help='With --analyze-images, images sent together in one Claude request '
+                             f'(default: {ANALYSIS_IMAGES_PER_REQUEST}; 1 sends each image separately)')
+    parser.add_argument('--min-image-size', type=int, default=0, metavar='PX',
+                        help='With --analyze-images, skip images whose width or height is '
+                             'below PX pixels, such as icons and bullet glyphs (default: 0, analyze all)')
+    parser.add_argument('--workers', type=int,
+                        help='Number of processes used to extract slides '
+                             '(default: based on CPU count and deck size; 1 to disable)')
 
     args = parser.parse_args()
+    ANALYSIS_THREADS = max(1, args.max_concurrency)
 
     # Initialize image analysis if requested
     if args.analyze_images:
         if not ANTHROPIC_AVAILABLE:
             print("Error: --analyze-images requires the anthropic package.")
-            print("Install with: pip install anthropic")
+            print("Install with: pip install anthropic (optionally pybase64 and h2 for faster requests)")
             sys.exit(1)
 
         if not os.environ.get('ANTHROPIC_API_KEY'):
@@ -1279,7 +1933,8 @@ def main():
         else:
             print("Warning: Could not initialize Anthropic client. Continuing without image analysis.")
 
-    extract_pptx(args.input, args.output)
+    extract_pptx(args.input, args.output, args.workers, args.batch_analysis, args.min_image_size,
+                 max(1, args.images_per_request))
 
 
 if __name__ == "__main__":
@@ -57,7 +57,7 @@ export interface TextRun {
 export interface ListItem {
   text: string;
   level: number;
-  children: ListItem[];
+  children?: ListItem[];
   runs?: TextRun[];
 }
 
@@ -65,7 +65,7 @@ export interface ImageContent {
   type: 'image';
   src: string;
   alt: string;
-  caption: string;
+  caption?: string;
   description?: string; // AI-generated description of image content
   category?: string; // AI-generated category (tweet, screenshot, diagram, etc.)
   quote_text?: string; // Extracted quote from image (tweets, messages, etc.)